@@ -1,16 +1,88 @@
 ﻿import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import datetime
 import json
 import os
+import string
+import numpy as np
 
 # Application Configuration
 APP_VERSION = "v2.1.0"
 RELEASE_DATE = "2025-08-04"
 DEVELOPERS = "MS Hadianto & Khalisa NF Shasie"
 
+# Answer scales per assessment (immutable, shared across reruns)
+_OPTIONS_PSS10 = ("Tidak Pernah", "Hampir Tidak Pernah", "Kadang-kadang", "Cukup Sering", "Sangat Sering")
+_OPTIONS_DASS21 = ("Tidak Pernah", "Kadang-kadang", "Sering", "Sangat Sering")
+_OPTIONS_BURNOUT = ("Tidak Pernah", "Beberapa kali setahun", "Sebulan sekali", "Beberapa kali sebulan", "Seminggu sekali", "Beberapa kali seminggu", "Setiap hari")
+_OPTIONS_WORKLIFE = ("Sangat Tidak Setuju", "Tidak Setuju", "Netral", "Setuju", "Sangat Setuju")
+
+# Landing page sector tabs
+_HEALTHCARE_MD = """
+**Healthcare Organizations**
+- Patient mental health screening dan monitoring
+- Treatment progress evaluation
+- Risk stratification untuk intervensi yang tepat
+- Evidence-based treatment planning
+- Clinical decision support
+"""
+
+_CORPORATE_MD = """
+**Corporate Wellbeing**
+- Employee mental health screening program
+- Workplace stress management initiative
+- Burnout prevention dan early intervention
+- Return-to-work assessment
+- Workforce wellness analytics
+"""
+
+_EDUCATION_MD = """
+**Educational Institutions**
+- Student mental health support program
+- Staff wellbeing monitoring
+- Counseling center assessment tools
+- Academic stress evaluation
+- Campus mental health initiatives
+"""
+
+_RESEARCH_MD = """
+**Research Applications**
+- Data collection untuk penelitian kesehatan mental
+- Population health studies
+- Intervention effectiveness evaluation
+- Longitudinal mental health tracking
+- Academic research support
+"""
+
+_TAB_BODIES = (
+    ("🏥 Healthcare", _HEALTHCARE_MD),
+    ("🏢 Corporate", _CORPORATE_MD),
+    ("🎓 Education", _EDUCATION_MD),
+    ("🔬 Research", _RESEARCH_MD),
+)
+
+# Downloadable report template, parsed once at import
+_REPORT_TMPL = string.Template("""
+STRIVE Pro - Laporan Assessment
+===============================
+
+Peserta: $name
+Assessment: $title
+Tanggal: $date
+
+HASIL:
+------
+Skor Total: $total/$max_score
+Persentase: $percentage%
+Kategori: $category
+
+INTERPRETASI:
+------------
+$interpretation
+
+Generated by STRIVE Pro $version
+Developed by $developers
+""")
+
 def init_session_state():
     if 'current_assessment' not in st.session_state:
         st.session_state.current_assessment = None
@@ -26,6 +98,8 @@ def init_session_state():
         st.session_state.user_name = None
     if 'visitor_count' not in st.session_state:
         st.session_state.visitor_count = load_visitor_count()
+    if 'visitor_count_fmt' not in st.session_state:
+        st.session_state.visitor_count_fmt = f"{st.session_state.visitor_count:,}"
 
 def load_visitor_count():
     '''Load visitor count from file or initialize'''
@@ -51,6 +125,7 @@ def increment_visitor_count():
     '''Increment visitor count'''
     if 'visitor_incremented' not in st.session_state:
         st.session_state.visitor_count += 1
+        st.session_state.visitor_count_fmt = f"{st.session_state.visitor_count:,}"
         save_visitor_count(st.session_state.visitor_count)
         st.session_state.visitor_incremented = True
 
@@ -128,28 +203,28 @@ def get_worklife_questions():
         "Saya puas dengan jumlah waktu yang tersedia untuk aktivitas non-kerja"
     ]
 
+def _pss10_interpret(total_score):
+    if total_score <= 13:
+        return ("Tingkat Stress Rendah", "#28a745",
+                "Anda menunjukkan tingkat stress yang rendah. Pertahankan strategi coping yang sehat.")
+    elif total_score <= 26:
+        return ("Tingkat Stress Sedang", "#ffc107",
+                "Anda mengalami tingkat stress yang sedang. Pertimbangkan teknik manajemen stress.")
+    return ("Tingkat Stress Tinggi", "#dc3545",
+            "Anda mengalami tingkat stress yang tinggi. Disarankan untuk berkonsultasi dengan profesional.")
+
+_PSS10_REVERSE_ITEMS = frozenset((3, 4, 6, 7))
+
 def calculate_pss10_score(answers):
-    reverse_items = [3, 4, 6, 7]
     total_score = 0
     
     for i, answer in enumerate(answers):
-        if i in reverse_items:
+        if i in _PSS10_REVERSE_ITEMS:
             total_score += (4 - answer)
         else:
             total_score += answer
     
-    if total_score <= 13:
-        category = "Tingkat Stress Rendah"
-        color = "#28a745"
-        interpretation = "Anda menunjukkan tingkat stress yang rendah. Pertahankan strategi coping yang sehat."
-    elif total_score <= 26:
-        category = "Tingkat Stress Sedang"
-        color = "#ffc107"
-        interpretation = "Anda mengalami tingkat stress yang sedang. Pertimbangkan teknik manajemen stress."
-    else:
-        category = "Tingkat Stress Tinggi"
-        color = "#dc3545"
-        interpretation = "Anda mengalami tingkat stress yang tinggi. Disarankan untuk berkonsultasi dengan profesional."
+    category, color, interpretation = _pss10_interpret(total_score)
     
     return {
         'total_score': total_score,
@@ -160,21 +235,29 @@ def calculate_pss10_score(answers):
         'interpretation': interpretation
     }
 
-def calculate_dass21_score(answers):
-    total_score = sum(answers)
-    
+def calculate_pss10_batch(answers_matrix):
+    '''Calculate PSS-10 total scores for many respondents at once (research/batch use)'''
+    # Imported on first use: keeps Numba off the page-load path and the kernel cached across reruns
+    from strive_pss10_kernel import pss10_batch
+    
+    answers_2d = np.ascontiguousarray(answers_matrix, dtype=np.int8)
+    if answers_2d.ndim != 2 or answers_2d.shape[1] != 10:
+        raise ValueError("answers_matrix must have shape (n_respondents, 10)")
+    return pss10_batch(answers_2d)
+
+def _dass21_interpret(total_score):
     if total_score <= 20:
-        category = "Normal"
-        color = "#28a745"
+        return "Normal", "#28a745"
     elif total_score <= 40:
-        category = "Ringan"
-        color = "#ffc107"
+        return "Ringan", "#ffc107"
     elif total_score <= 60:
-        category = "Sedang"
-        color = "#fd7e14"
-    else:
-        category = "Berat"
-        color = "#dc3545"
+        return "Sedang", "#fd7e14"
+    return "Berat", "#dc3545"
+
+def calculate_dass21_score(answers):
+    total_score = sum(answers)
+    
+    category, color = _dass21_interpret(total_score)
     
     return {
         'total_score': total_score,
@@ -188,23 +271,23 @@ def calculate_dass21_score(answers):
         'interpretation': f"Skor menunjukkan tingkat {category.lower()} untuk gejala depresi, kecemasan, dan stress."
     }
 
+def _burnout_interpret(total_score, max_score):
+    percentage = (total_score / max_score) * 100
+    if percentage <= 30:
+        return ("Burnout Rendah", "#28a745",
+                "Tingkat burnout Anda rendah. Pertahankan keseimbangan kerja yang sehat.")
+    elif percentage <= 60:
+        return ("Burnout Sedang", "#ffc107",
+                "Anda mengalami beberapa gejala burnout. Pertimbangkan strategi untuk mengurangi stress kerja.")
+    return ("Burnout Tinggi", "#dc3545",
+            "Anda mengalami tingkat burnout yang tinggi. Disarankan untuk berkonsultasi dengan profesional dan mengevaluasi beban kerja.")
+
 def calculate_burnout_score(answers):
     total_score = sum(answers)
     max_score = len(answers) * 6
     percentage = (total_score / max_score) * 100
     
-    if percentage <= 30:
-        category = "Burnout Rendah"
-        color = "#28a745"
-        interpretation = "Tingkat burnout Anda rendah. Pertahankan keseimbangan kerja yang sehat."
-    elif percentage <= 60:
-        category = "Burnout Sedang"
-        color = "#ffc107"
-        interpretation = "Anda mengalami beberapa gejala burnout. Pertimbangkan strategi untuk mengurangi stress kerja."
-    else:
-        category = "Burnout Tinggi"
-        color = "#dc3545"
-        interpretation = "Anda mengalami tingkat burnout yang tinggi. Disarankan untuk berkonsultasi dengan profesional dan mengevaluasi beban kerja."
+    category, color, interpretation = _burnout_interpret(total_score, max_score)
     
     return {
         'total_score': total_score,
@@ -215,27 +298,26 @@ def calculate_burnout_score(answers):
         'interpretation': interpretation
     }
 
+def _worklife_interpret(total_score, max_score):
+    percentage = (total_score / max_score) * 100
+    if percentage >= 75:
+        return ("Work-Life Balance Sangat Baik", "#28a745",
+                "Anda memiliki keseimbangan kerja-hidup yang sangat baik.")
+    elif percentage >= 60:
+        return ("Work-Life Balance Baik", "#20c997",
+                "Anda memiliki keseimbangan kerja-hidup yang baik dengan beberapa area untuk perbaikan.")
+    elif percentage >= 40:
+        return ("Work-Life Balance Cukup", "#ffc107",
+                "Keseimbangan kerja-hidup Anda cukup, namun perlu perhatian pada beberapa aspek.")
+    return ("Work-Life Balance Buruk", "#dc3545",
+            "Keseimbangan kerja-hidup Anda memerlukan perhatian serius dan perubahan yang signifikan.")
+
 def calculate_worklife_score(answers):
     total_score = sum(answers)
     max_score = len(answers) * 4
     percentage = (total_score / max_score) * 100
     
-    if percentage >= 75:
-        category = "Work-Life Balance Sangat Baik"
-        color = "#28a745"
-        interpretation = "Anda memiliki keseimbangan kerja-hidup yang sangat baik."
-    elif percentage >= 60:
-        category = "Work-Life Balance Baik"
-        color = "#20c997"
-        interpretation = "Anda memiliki keseimbangan kerja-hidup yang baik dengan beberapa area untuk perbaikan."
-    elif percentage >= 40:
-        category = "Work-Life Balance Cukup"
-        color = "#ffc107"
-        interpretation = "Keseimbangan kerja-hidup Anda cukup, namun perlu perhatian pada beberapa aspek."
-    else:
-        category = "Work-Life Balance Buruk"
-        color = "#dc3545"
-        interpretation = "Keseimbangan kerja-hidup Anda memerlukan perhatian serius dan perubahan yang signifikan."
+    category, color, interpretation = _worklife_interpret(total_score, max_score)
     
     return {
         'total_score': total_score,
@@ -264,7 +346,7 @@ def show_landing_page():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("👥 Total Pengakses", f"{st.session_state.visitor_count:,}")
+        st.metric("👥 Total Pengakses", st.session_state.visitor_count_fmt)
     
     with col2:
         st.metric("📋 Assessment Tools", "4")
@@ -345,47 +427,9 @@ def show_landing_page():
     ### 🏢 **Cocok Untuk Berbagai Sektor**
     """)
     
-    tab1, tab2, tab3, tab4 = st.tabs(["🏥 Healthcare", "🏢 Corporate", "🎓 Education", "🔬 Research"])
-    
-    with tab1:
-        st.markdown("""
-        **Healthcare Organizations**
-        - Patient mental health screening dan monitoring
-        - Treatment progress evaluation
-        - Risk stratification untuk intervensi yang tepat
-        - Evidence-based treatment planning
-        - Clinical decision support
-        """)
-    
-    with tab2:
-        st.markdown("""
-        **Corporate Wellbeing**
-        - Employee mental health screening program
-        - Workplace stress management initiative
-        - Burnout prevention dan early intervention
-        - Return-to-work assessment
-        - Workforce wellness analytics
-        """)
-    
-    with tab3:
-        st.markdown("""
-        **Educational Institutions**
-        - Student mental health support program
-        - Staff wellbeing monitoring
-        - Counseling center assessment tools
-        - Academic stress evaluation
-        - Campus mental health initiatives
-        """)
-    
-    with tab4:
-        st.markdown("""
-        **Research Applications**
-        - Data collection untuk penelitian kesehatan mental
-        - Population health studies
-        - Intervention effectiveness evaluation
-        - Longitudinal mental health tracking
-        - Academic research support
-        """)
+    tabs = st.tabs([label for label, _ in _TAB_BODIES])
+    for tab, (_, body) in zip(tabs, _TAB_BODIES):
+        tab.markdown(body)
     
     # User Input Section
     if not st.session_state.user_name:
@@ -527,7 +571,7 @@ def show_footer():
     with col2:
         st.markdown(f"""
         **📊 Statistics**
-        - Total Users: {st.session_state.visitor_count:,}
+        - Total Users: {st.session_state.visitor_count_fmt}
         - Assessments: 4 Tools
         - Languages: Bahasa Indonesia
         """)
@@ -564,25 +608,42 @@ def show_footer():
     </div>
     """, unsafe_allow_html=True)
 
+def _save_answer(current_q):
+    '''Store the radio selection for the given question'''
+    answer = st.session_state[f'q_{current_q}']
+    if current_q == len(st.session_state.answers):
+        st.session_state.answers.append(answer)
+    else:
+        st.session_state.answers[current_q] = answer
+
+def _next_question(current_q):
+    _save_answer(current_q)
+    st.session_state.current_question += 1
+
+def _previous_question():
+    st.session_state.current_question -= 1
+
+@st.fragment
 def show_assessment():
+    '''Question form; runs as a fragment so navigation only reruns this block'''
     assessment_type = st.session_state.current_assessment
     
     # Get questions and options based on assessment type
     if assessment_type == 'PSS-10':
         questions = get_pss10_questions()
-        options = ["Tidak Pernah", "Hampir Tidak Pernah", "Kadang-kadang", "Cukup Sering", "Sangat Sering"]
+        options = _OPTIONS_PSS10
         title = "Perceived Stress Scale (PSS-10)"
     elif assessment_type == 'DASS-21':
         questions = get_dass21_questions()
-        options = ["Tidak Pernah", "Kadang-kadang", "Sering", "Sangat Sering"]
+        options = _OPTIONS_DASS21
         title = "Depression Anxiety Stress Scale (DASS-21)"
     elif assessment_type == 'BURNOUT':
         questions = get_burnout_questions()
-        options = ["Tidak Pernah", "Beberapa kali setahun", "Sebulan sekali", "Beberapa kali sebulan", "Seminggu sekali", "Beberapa kali seminggu", "Setiap hari"]
+        options = _OPTIONS_BURNOUT
         title = "Maslach Burnout Inventory"
     else:  # WORKLIFE
         questions = get_worklife_questions()
-        options = ["Sangat Tidak Setuju", "Tidak Setuju", "Netral", "Setuju", "Sangat Setuju"]
+        options = _OPTIONS_WORKLIFE
         title = "Work-Life Balance Scale"
     
     current_q = st.session_state.current_question
@@ -607,7 +668,7 @@ def show_assessment():
         answer = st.radio(
             'Pilih jawaban Anda:',
             range(len(options)),
-            format_func=lambda x: options[x],
+            format_func=options.__getitem__,
             key=f'q_{current_q}'
         )
         
@@ -618,9 +679,7 @@ def show_assessment():
         
         with col1:
             if current_q > 0:
-                if st.button('⬅️ Sebelumnya', use_container_width=True):
-                    st.session_state.current_question -= 1
-                    st.rerun()
+                st.button('⬅️ Sebelumnya', use_container_width=True, on_click=_previous_question)
         
         with col2:
             if st.button('🏠 Kembali ke Menu', use_container_width=True):
@@ -630,21 +689,15 @@ def show_assessment():
                 st.rerun()
         
         with col3:
-            button_text = '✅ Selesai' if current_q == total_questions - 1 else '➡️ Selanjutnya'
-            if st.button(button_text, type='primary', use_container_width=True):
-                # Save answer
-                if current_q == len(st.session_state.answers):
-                    st.session_state.answers.append(answer)
-                else:
-                    st.session_state.answers[current_q] = answer
-                
-                if current_q == total_questions - 1:
-                    # Assessment complete
+            if current_q == total_questions - 1:
+                if st.button('✅ Selesai', type='primary', use_container_width=True):
+                    # Assessment complete - full rerun to leave the fragment
+                    _save_answer(current_q)
                     st.session_state.assessment_complete = True
                     st.rerun()
-                else:
-                    st.session_state.current_question += 1
-                    st.rerun()
+            else:
+                st.button('➡️ Selanjutnya', type='primary', use_container_width=True,
+                          on_click=_next_question, args=(current_q,))
     
     else:
         st.session_state.assessment_complete = True
@@ -654,6 +707,11 @@ def show_results():
     assessment_type = st.session_state.current_assessment
     answers = st.session_state.answers
     
+    # Timestamp once per render, shared by the page header and the report
+    _now = datetime.datetime.now()
+    now_str = _now.strftime('%d %B %Y, %H:%M')
+    date_str = _now.strftime('%Y-%m-%d')
+    
     # Calculate results based on assessment type
     if assessment_type == 'PSS-10':
         results = calculate_pss10_score(answers)
@@ -670,7 +728,7 @@ def show_results():
     
     st.title(f'📊 {title}')
     st.markdown(f'**Peserta:** {st.session_state.user_name}')
-    st.markdown(f'**Tanggal:** {datetime.datetime.now().strftime("%d %B %Y, %H:%M")}')
+    st.markdown(f'**Tanggal:** {now_str}')
     st.markdown('---')
     
     # Results display
@@ -729,32 +787,23 @@ def show_results():
     
     with col2:
         # Generate simple report
-        report_content = f"""
-STRIVE Pro - Laporan Assessment
-===============================
-
-Peserta: {st.session_state.user_name}
-Assessment: {title}
-Tanggal: {datetime.datetime.now().strftime('%d %B %Y, %H:%M')}
-
-HASIL:
-------
-Skor Total: {results['total_score']}/{results['max_score']}
-Persentase: {results['percentage']:.1f}%
-Kategori: {results['category']}
-
-INTERPRETASI:
-------------
-{results['interpretation']}
-
-Generated by STRIVE Pro {APP_VERSION}
-Developed by {DEVELOPERS}
-"""
+        report_content = _REPORT_TMPL.substitute(
+            name=st.session_state.user_name,
+            title=title,
+            date=now_str,
+            total=results['total_score'],
+            max_score=results['max_score'],
+            percentage=f"{results['percentage']:.1f}",
+            category=results['category'],
+            interpretation=results['interpretation'],
+            version=APP_VERSION,
+            developers=DEVELOPERS
+        )
         
         st.download_button(
             label='📄 Download Laporan',
             data=report_content,
-            file_name=f'strive_{assessment_type.lower()}_{datetime.date.today()}.txt',
+            file_name=f'strive_{assessment_type.lower()}_{date_str}.txt',
             mime='text/plain',
             use_container_width=True
         )
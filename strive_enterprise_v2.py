@@ -1,34 +1,60 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 import datetime
 import json
 import os
 import hashlib
+import time
 import uuid
+import zlib
 import base64
 import io
-from typing import Dict, List, Optional, Tuple
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import sqlite3
 from dataclasses import dataclass
 from enum import Enum
+from types import MappingProxyType
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
+# plotly, reportlab and sklearn are imported where they are first used to keep cold starts fast
 import warnings
 warnings.filterwarnings('ignore')
 
+# Optional: JIT-compiled kernels for large analytics aggregations
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Optional: compact binary storage for JSON-like columns
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Optional: C-implemented JSON for cache keys and the non-msgpack storage path
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Password hashing shared with the phase 3 app
+import strive_security
+
+# Scorers live in an imported module so their memo caches survive Streamlit reruns
+from strive_scoring import calculate_assessment_scores
+
 # ============================================================================
 # APPLICATION CONFIGURATION
 # ============================================================================
@@ -88,14 +114,219 @@ class AssessmentResult:
 # DATABASE MANAGER
 # ============================================================================
 
+# Payloads above this size are zlib-compressed behind a one-byte marker.
+# Neither marker can start a packed dict/list, so uncompressed msgpack stays unprefixed.
+COMPRESS_THRESHOLD = 512
+_ZLIB_MSGPACK = b"Z"
+_ZLIB_JSON = b"J"
+
+if ORJSON_AVAILABLE:
+    _ORJSON_SORTED = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    
+    def _json_text(d) -> str:
+        return orjson.dumps(d, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    def _canonical_json(d) -> bytes:
+        return orjson.dumps(d, option=_ORJSON_SORTED)
+    
+    _json_loads = orjson.loads
+else:
+    def _json_text(d) -> str:
+        return json.dumps(d, separators=(',', ':'))
+    
+    def _canonical_json(d) -> bytes:
+        # Sorted keys so equal dicts give equal bytes, e.g. as a cache key
+        return json.dumps(d, sort_keys=True, separators=(',', ':')).encode()
+    
+    _json_loads = json.loads
+
+def _pack(d) -> object:
+    # msgpack BLOB when available, otherwise compact JSON text
+    if MSGPACK_AVAILABLE:
+        raw, marker = msgpack.packb(d, use_bin_type=True), _ZLIB_MSGPACK
+        if len(raw) <= COMPRESS_THRESHOLD:
+            return raw
+    else:
+        text, marker = _json_text(d), _ZLIB_JSON
+        if len(text) <= COMPRESS_THRESHOLD:
+            return text
+        raw = text.encode()
+    return marker + zlib.compress(raw, 1)
+
+def _unpack(value):
+    # Rows written before the msgpack switch are still JSON text
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return _json_loads(value)
+    marker = value[:1]
+    if marker == _ZLIB_JSON:
+        return _json_loads(zlib.decompress(value[1:]))
+    if marker == _ZLIB_MSGPACK:
+        value = zlib.decompress(value[1:])
+    return msgpack.unpackb(value, raw=False)
+
+RISK_WEIGHTS = (("low", 1), ("moderate", 2), ("high", 3), ("critical", 4))
+
+# Applied once to every pooled connection. page_size only takes effect on a new
+# database, so it must run before journal_mode=WAL writes the file header.
+SQLITE_PRAGMAS = (
+    "PRAGMA page_size=8192",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MiB read window for analytics scans
+)
+
+# Per-connection prepared statement cache; comfortably holds every _SQL_* constant
+SQLITE_CACHED_STATEMENTS = 256
+
+# Connections opened up front and shared by all sessions; Streamlit runs each rerun
+# on a fresh thread, so per-thread connections would be reopened on every rerun.
+# Readers get their own pool so dashboard traffic can never hold the writer's handle.
+SQLITE_READ_POOL_SIZE = 16
+SQLITE_WRITE_POOL_SIZE = 2
+
+# Hot statements kept as constants so the connection's statement cache reuses them
+_SQL_AUTH = ("SELECT id, username, email, password_hash, full_name, role, organization, department, is_active "
+             "FROM users WHERE username = ? AND is_active = 1")
+_SQL_UPDATE_LAST_LOGIN = "UPDATE users SET last_login = ? WHERE id = ?"
+_SQL_UPDATE_PASSWORD_HASH = "UPDATE users SET password_hash = ? WHERE id = ?"
+_SQL_INSERT_USER = ("INSERT INTO users (id, username, email, password_hash, full_name, role, organization, department) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+_SQL_USERS_BY_ORG = ("SELECT id, username, email, full_name, role, department, is_active, created_at "
+                     "FROM users WHERE organization = ? ORDER BY created_at DESC")
+# Users-overview metrics in one pass; created_at is CURRENT_TIMESTAMP text, so it compares with datetime()
+_SQL_ORG_USER_STATS = ("SELECT COUNT(*), COALESCE(SUM(is_active <> 0), 0), "
+                       "COALESCE(SUM(role IN ('admin', 'super_admin')), 0), "
+                       "COALESCE(SUM(created_at >= datetime('now', ?2)), 0) "
+                       "FROM users WHERE organization = ?1")
+_SQL_INSERT_ASSESSMENT = ("INSERT INTO assessment_results (id, user_id, assessment_type, scores, risk_level, ai_insights) "
+                          "VALUES (?, ?, ?, ?, ?, ?)")
+_SQL_USER_ASSESSMENTS = ("SELECT id, assessment_type, scores, risk_level, ai_insights, created_at "
+                         "FROM assessment_results WHERE user_id = ? ORDER BY created_at DESC LIMIT ?")
+_SQL_INSERT_NOTIFICATION = ("INSERT INTO email_notifications (id, user_id, subject, body, scheduled_at) "
+                            "VALUES (?, ?, ?, ?, ?)")
+_SQL_DUE_NOTIFICATIONS = ("SELECT id, user_id, subject, body, scheduled_at FROM email_notifications "
+                          "WHERE status = 'pending' AND scheduled_at <= ? ORDER BY scheduled_at")
+# Dashboard bundle: every statement scopes to the organization through the same
+# org_users CTE (?1 = organization) on idx_users_org_dept / idx_users_org_login.
+_SQL_ORG_USERS_CTE = ("WITH org_users AS ("
+                      "SELECT id, department, last_login FROM users WHERE organization = ?1) ")
+# ?2 = last_login cutoff (epoch seconds)
+_SQL_ORG_USER_COUNTS = (_SQL_ORG_USERS_CTE +
+                        "SELECT COUNT(*), COALESCE(SUM(CASE WHEN last_login > ?2 THEN 1 ELSE 0 END), 0) "
+                        "FROM org_users")
+# ?2 = created_at cutoff. The assessed-user count is an EXISTS probe per
+# org user on the (user_id, created_at) index rather than a DISTINCT hash set.
+_SQL_ORG_RISK_SUMMARY = (_SQL_ORG_USERS_CTE +
+                         "SELECT ar.risk_level, COUNT(*), "
+                         "(SELECT COUNT(*) FROM org_users u2 WHERE EXISTS ("
+                         "SELECT 1 FROM assessment_results ar2 "
+                         "WHERE ar2.user_id = u2.id AND ar2.created_at > ?2)) "
+                         "FROM assessment_results ar "
+                         "JOIN org_users u ON ar.user_id = u.id "
+                         "WHERE ar.created_at > ?2 "
+                         "GROUP BY ar.risk_level")
+# Assessments are pre-aggregated per user, so the outer join yields one row per user and
+# needs no DISTINCT. A user without assessments counts once as "moderate" (2), as do
+# unknown risk levels.
+_SQL_DEPT_ANALYTICS = (_SQL_ORG_USERS_CTE +
+                       "SELECT u.department, COUNT(*), COUNT(s.user_id), "
+                       "SUM(COALESCE(s.w, 2)) * 1.0 / SUM(COALESCE(s.n, 1)) "
+                       "FROM org_users u LEFT JOIN ("
+                       "SELECT u2.id AS user_id, COUNT(*) AS n, SUM(COALESCE(rw.weight, 2)) AS w "
+                       "FROM org_users u2 "
+                       "JOIN assessment_results ar ON ar.user_id = u2.id "
+                       "LEFT JOIN risk_weights rw ON rw.risk_level = ar.risk_level "
+                       "GROUP BY u2.id) s ON s.user_id = u.id "
+                       "GROUP BY u.department")
+_SQL_TREND_ANALYSIS = ("SELECT DATE(ar.created_at) AS assessment_date, COUNT(*), AVG(COALESCE(rw.weight, 2)) "
+                       "FROM assessment_results ar "
+                       "JOIN users u ON ar.user_id = u.id "
+                       "LEFT JOIN risk_weights rw ON rw.risk_level = ar.risk_level "
+                       "WHERE u.organization = ? AND ar.created_at > ? "
+                       "GROUP BY DATE(ar.created_at) "
+                       "ORDER BY assessment_date")
+_SQL_TREND_COUNT = ("SELECT COUNT(*) FROM assessment_results ar "
+                    "JOIN users u ON ar.user_id = u.id "
+                    "WHERE u.organization = ? AND ar.created_at > ?")
+# Epoch day (UTC, matching DATE(created_at)) and risk weight per row for in-process grouping
+_SQL_TREND_ROWS = ("SELECT CAST(strftime('%s', ar.created_at) AS INTEGER) / 86400, COALESCE(rw.weight, 2) "
+                   "FROM assessment_results ar "
+                   "JOIN users u ON ar.user_id = u.id "
+                   "LEFT JOIN risk_weights rw ON rw.risk_level = ar.risk_level "
+                   "WHERE u.organization = ? AND ar.created_at > ?")
+_SQL_DEPT_RISK_BREAKDOWN = ("SELECT COALESCE(u.department, 'Unknown') AS department, ar.risk_level, COUNT(*) AS assessments "
+                            "FROM users u JOIN assessment_results ar ON ar.user_id = u.id "
+                            "WHERE u.organization = ? AND ar.created_at > ? "
+                            "GROUP BY u.department, ar.risk_level")
+
+class ConnectionPool:
+    # Bounded pool of pre-opened connections; borrowers block when all are in use
+    def __init__(self, factory, size: int):
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        self._waiters = 0
+        self._waiters_lock = threading.Lock()
+        for _ in range(size):
+            self._idle.put(factory())
+    
+    @property
+    def free(self) -> int:
+        return self._idle.qsize()
+    
+    @property
+    def waiters(self) -> int:
+        return self._waiters
+    
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        # Only contended borrowers pay for the waiter bookkeeping
+        with self._waiters_lock:
+            self._waiters += 1
+        try:
+            return self._idle.get(timeout=timeout)
+        finally:
+            with self._waiters_lock:
+                self._waiters -= 1
+    
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            # A borrower bailed out mid-transaction; never hand that state to the next one
+            conn.rollback()
+        self._idle.put(conn)
+    
+    @contextmanager
+    def borrow(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
 class EnterpriseDatabase:
     def __init__(self, db_path: str = "strive_enterprise.db"):
         self.db_path = db_path
+        self._write_pool = ConnectionPool(self._open_connection, SQLITE_WRITE_POOL_SIZE)
+        # Single writer: SQLite serializes writers anyway, this keeps them off busy_timeout
+        self._write_lock = threading.Semaphore(1)
         self.init_database()
+        # Opened after the schema exists; query_only turns a stray write into an error
+        self._read_pool = ConnectionPool(lambda: self._open_connection(read_only=True), SQLITE_READ_POOL_SIZE)
     
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
+        with self._write_pool.borrow() as conn:
+            self._create_schema(conn)
+    
+    def _create_schema(self, conn: sqlite3.Connection):
         cursor = conn.cursor()
+        # Schema setup and migrations apply as one transaction
+        cursor.execute('BEGIN IMMEDIATE')
         
         # Users table
         cursor.execute('''
@@ -110,7 +341,7 @@ class EnterpriseDatabase:
                 department TEXT,
                 is_active BOOLEAN DEFAULT 1,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP
+                last_login INTEGER
             )
         ''')
         
@@ -120,9 +351,9 @@ class EnterpriseDatabase:
                 id TEXT PRIMARY KEY,
                 user_id TEXT NOT NULL,
                 assessment_type TEXT NOT NULL,
-                scores TEXT NOT NULL,
+                scores BLOB NOT NULL,
                 risk_level TEXT NOT NULL,
-                ai_insights TEXT,
+                ai_insights BLOB,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
@@ -147,7 +378,7 @@ class EnterpriseDatabase:
                 user_id TEXT NOT NULL,
                 subject TEXT NOT NULL,
                 body TEXT NOT NULL,
-                scheduled_at TIMESTAMP,
+                scheduled_at INTEGER,
                 sent_at TIMESTAMP,
                 status TEXT DEFAULT 'pending',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -155,6 +386,16 @@ class EnterpriseDatabase:
             )
         ''')
         
+        # Numeric weight per risk level, joined by the analytics averages
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS risk_weights (
+                risk_level TEXT PRIMARY KEY,
+                weight INTEGER NOT NULL
+            )
+        ''')
+        cursor.executemany('INSERT OR REPLACE INTO risk_weights (risk_level, weight) VALUES (?, ?)',
+                           RISK_WEIGHTS)
+        
         # System settings table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS system_settings (
@@ -164,6 +405,31 @@ class EnterpriseDatabase:
             )
         ''')
         
+        # Indexes for login, per-organization analytics and per-user history
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_username_active ON users(username, is_active)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_org_login ON users(organization, last_login)')
+        # Covers the org_users CTE and the department joins, so they never read table rows
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_org_dept_cover ON users(organization, department, last_login, id)')
+        # Users listing in created_at order without a sort, and the overview stats index-only
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_org_created ON users(organization, created_at, is_active, role)')
+        # Covers the grouped risk queries without touching the table rows
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ar_user_created ON assessment_results(user_id, created_at, risk_level)')
+        # Superseded by the composite indexes above
+        cursor.execute('DROP INDEX IF EXISTS idx_users_org')
+        cursor.execute('DROP INDEX IF EXISTS idx_users_org_dept')
+        cursor.execute('DROP INDEX IF EXISTS idx_assessment_user')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notif_scheduled ON email_notifications(scheduled_at) WHERE status = 'pending'")
+        
+        # last_login/scheduled_at are epoch seconds; convert rows stored as local ISO strings
+        cursor.execute('''
+            UPDATE users SET last_login = CAST(strftime('%s', last_login, 'utc') AS INTEGER)
+            WHERE typeof(last_login) = 'text'
+        ''')
+        cursor.execute('''
+            UPDATE email_notifications SET scheduled_at = CAST(strftime('%s', scheduled_at, 'utc') AS INTEGER)
+            WHERE typeof(scheduled_at) = 'text'
+        ''')
+        
         # Create default admin user if not exists
         cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'super_admin'")
         if cursor.fetchone()[0] == 0:
@@ -176,65 +442,146 @@ class EnterpriseDatabase:
                   "super_admin", "STRIVE Pro", "IT"))
         
         conn.commit()
-        conn.close()
+        
+        # Refresh planner statistics so the composite indexes get picked; only
+        # re-analyzes tables that changed noticeably, so it is cheap per process start
+        conn.execute('PRAGMA optimize')
+    
+    def _open_connection(self, read_only: bool = False) -> sqlite3.Connection:
+        # Autocommit mode: reads never open a transaction, writes go through connection(write=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=SQLITE_CACHED_STATEMENTS,
+                               isolation_level=None)
+        # Row still supports positional access, and dict(row) maps columns directly
+        conn.row_factory = sqlite3.Row
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        if read_only:
+            conn.execute('PRAGMA query_only = 1')
+        return conn
+    
+    def borrow_read(self):
+        # Pooled read-only connection for the duration of a with-block; callers must not close it
+        return self._read_pool.borrow()
+    
+    @contextmanager
+    def borrow_write(self) -> Iterator[sqlite3.Connection]:
+        # One writer at a time, inside a transaction that commits or rolls back on exit
+        with self._write_lock, self._write_pool.borrow() as conn:
+            # IMMEDIATE takes the write lock up front instead of upgrading mid-transaction
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    
+    def connection(self, write: bool = False):
+        return self.borrow_write() if write else self.borrow_read()
+    
+    @contextmanager
+    def snapshot(self):
+        # Deferred read transaction: every query inside sees the same database state
+        with self._read_pool.borrow() as conn:
+            conn.execute('BEGIN')
+            try:
+                yield conn
+            finally:
+                conn.commit()
+    
+    def pool_stats(self) -> Dict[str, int]:
+        return {
+            'read_free': self._read_pool.free,
+            'write_free': self._write_pool.free,
+            'waiters': self._read_pool.waiters + self._write_pool.waiters
+        }
     
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
+    def bulk_insert_assessment_results(self, rows: List[Tuple]) -> List[str]:
+        # rows: (user_id, assessment_type, scores, risk_level, ai_insights)
+        result_ids = []
+        params = []
+        for user_id, assessment_type, scores, risk_level, ai_insights in rows:
+            result_id = str(uuid.uuid4())
+            result_ids.append(result_id)
+            params.append((result_id, user_id, assessment_type, _pack(scores),
+                           risk_level, _pack(ai_insights)))
+        
+        with self.connection(write=True) as conn:
+            conn.executemany(_SQL_INSERT_ASSESSMENT, params)
+        
+        return result_ids
+    
+    def get_user_assessment_results(self, user_id: str, limit: int = 5) -> List[Dict]:
+        with self.connection() as conn:
+            rows = conn.execute(_SQL_USER_ASSESSMENTS, (user_id, limit)).fetchall()
+        
+        results = []
+        for row in rows:
+            result = dict(row)
+            result['scores'] = _unpack(row['scores'])
+            result['ai_insights'] = _unpack(row['ai_insights'])
+            results.append(result)
+        return results
     
     def hash_password(self, password: str) -> str:
-        return hashlib.sha256(password.encode()).hexdigest()
+        return strive_security.hash_password(password)
+    
+    def needs_rehash(self, hash: str) -> bool:
+        return strive_security.needs_rehash(hash)
     
     def verify_password(self, password: str, hash: str) -> bool:
-        return self.hash_password(password) == hash
+        return strive_security.verify_password(password, hash)
+
+@st.cache_resource(show_spinner=False)
+def get_db() -> EnterpriseDatabase:
+    # Schema setup and the connection pools are created once per process
+    return EnterpriseDatabase()
 
 # ============================================================================
 # AI RISK PREDICTION ENGINE
 # ============================================================================
 
+@st.cache_data(show_spinner=False)
+def generate_risk_training_data(n_samples: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+    # Simulate training data (in real implementation, use historical data)
+    rng = np.random.default_rng(42)
+    
+    # Features: age, stress_score, burnout_score, worklife_score, prev_assessments
+    X = rng.integers(low=[22, 0, 0, 0, 0], high=[65, 40, 90, 20, 10],
+                     size=(n_samples, 5)).astype(np.float64)
+    
+    # Generate risk levels based on scores
+    stress, burnout = X[:, 1], X[:, 2]
+    y = np.select(
+        [(stress > 30) | (burnout > 70),   # Critical
+         (stress > 20) | (burnout > 50),   # High
+         (stress > 10) | (burnout > 30)],  # Moderate
+        [3, 2, 1],
+        default=0                          # Low
+    ).astype(np.int8)
+    
+    return X, y
+
 class AIRiskPredictor:
     def __init__(self):
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+        
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
         self.is_trained = False
         self._train_model()
     
     def _train_model(self):
-        # Simulate training data (in real implementation, use historical data)
-        np.random.seed(42)
-        n_samples = 1000
-        
-        # Features: age, stress_score, burnout_score, worklife_score, prev_assessments
-        X = np.random.rand(n_samples, 5)
-        X[:, 0] = np.random.randint(22, 65, n_samples)  # age
-        X[:, 1] = np.random.randint(0, 40, n_samples)   # stress score
-        X[:, 2] = np.random.randint(0, 90, n_samples)   # burnout score
-        X[:, 3] = np.random.randint(0, 20, n_samples)   # worklife score
-        X[:, 4] = np.random.randint(0, 10, n_samples)   # previous assessments
-        
-        # Generate risk levels based on scores
-        y = []
-        for i in range(n_samples):
-            stress = X[i, 1]
-            burnout = X[i, 2]
-            worklife = X[i, 3]
-            
-            if stress > 30 or burnout > 70:
-                risk = 3  # Critical
-            elif stress > 20 or burnout > 50:
-                risk = 2  # High
-            elif stress > 10 or burnout > 30:
-                risk = 1  # Moderate
-            else:
-                risk = 0  # Low
-            y.append(risk)
-        
-        y = np.array(y)
+        X, y = generate_risk_training_data()
         
         # Train model
         X_scaled = self.scaler.fit_transform(X)
         self.model.fit(X_scaled, y)
         self.is_trained = True
     
+    RISK_LABELS = ("low", "moderate", "high", "critical")
+    
     def predict_risk(self, assessment_data: Dict) -> Dict:
         if not self.is_trained:
             return {"risk_level": "moderate", "confidence": 0.5, "factors": []}
@@ -243,13 +590,24 @@ class AIRiskPredictor:
         features = self._extract_features(assessment_data)
         features_scaled = self.scaler.transform([features])
         
-        # Predict
+        # Predict; the class is the argmax of the probabilities, so one pass suffices
         risk_proba = self.model.predict_proba(features_scaled)[0]
-        risk_level = self.model.predict(features_scaled)[0]
+        return self._build_prediction(assessment_data, risk_proba)
+    
+    def predict_risk_batch(self, data_list: List[Dict]) -> List[Dict]:
+        if not data_list:
+            return []
+        if not self.is_trained:
+            return [self.predict_risk(data) for data in data_list]
         
-        risk_labels = ["low", "moderate", "high", "critical"]
-        predicted_risk = risk_labels[risk_level]
-        confidence = max(risk_proba)
+        X = np.array([self._extract_features(data) for data in data_list], dtype=np.float64)
+        probas = self.model.predict_proba(self.scaler.transform(X))
+        return [self._build_prediction(data, proba) for data, proba in zip(data_list, probas)]
+    
+    def _build_prediction(self, assessment_data: Dict, risk_proba: np.ndarray) -> Dict:
+        risk_index = int(np.argmax(risk_proba))
+        predicted_risk = self.RISK_LABELS[risk_index]
+        confidence = risk_proba[risk_index]
         
         # Generate insights
         insights = self._generate_insights(assessment_data, predicted_risk, confidence)
@@ -313,131 +671,227 @@ class AIRiskPredictor:
         else:
             return 90  # 3 months
 
+@st.cache_resource(show_spinner=False)
+def get_risk_predictor() -> AIRiskPredictor:
+    # Trained once per process and shared across reruns and sessions
+    return AIRiskPredictor()
+
 # ============================================================================
 # AUTHENTICATION & USER MANAGEMENT
 # ============================================================================
 
 class AuthenticationManager:
+    LOGIN_CACHE_TTL = 60  # seconds
+    LOGIN_CACHE_SIZE = 256
+    
     def __init__(self, db: EnterpriseDatabase):
         self.db = db
+        # (stored hash, sha256(password)) -> expires_at for recently verified passwords.
+        # Only the KDF is skipped: the user row, is_active and last_login are handled every time.
+        self._login_cache: Dict[Tuple[str, bytes], float] = {}
+        self._login_cache_lock = threading.Lock()
     
     def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        with self.db.connection() as conn:
+            result = conn.execute(_SQL_AUTH, (username,)).fetchone()
         
-        cursor.execute('''
-            SELECT id, username, email, password_hash, full_name, role, organization, department, is_active
-            FROM users WHERE username = ? AND is_active = 1
-        ''', (username,))
+        # The KDF runs outside the write lock (and hashlib.scrypt releases the GIL),
+        # so concurrent logins from other sessions are not blocked
+        if not (result and self._password_matches(password, result[3])):
+            return None
         
-        result = cursor.fetchone()
-        conn.close()
+        # Update last login, upgrading legacy password hashes in the same transaction
+        with self.db.connection(write=True) as conn:
+            self._update_last_login(result[0], conn)
+            if self.db.needs_rehash(result[3]):
+                conn.execute(_SQL_UPDATE_PASSWORD_HASH, (self.db.hash_password(password), result[0]))
         
-        if result and self.db.verify_password(password, result[3]):
-            # Update last login
-            self._update_last_login(result[0])
-            
-            return {
-                'id': result[0],
-                'username': result[1],
-                'email': result[2],
-                'full_name': result[4],
-                'role': result[5],
-                'organization': result[6],
-                'department': result[7]
-            }
-        return None
+        return {
+            'id': result[0],
+            'username': result[1],
+            'email': result[2],
+            'full_name': result[4],
+            'role': result[5],
+            'organization': result[6],
+            'department': result[7]
+        }
     
-    def _update_last_login(self, user_id: str):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('UPDATE users SET last_login = ? WHERE id = ?', 
-                      (datetime.datetime.now().isoformat(), user_id))
-        conn.commit()
-        conn.close()
+    def _password_matches(self, password: str, stored_hash: str) -> bool:
+        # Keyed on the stored hash, so a password change or rehash never hits a stale entry
+        cache_key = (stored_hash, hashlib.sha256(password.encode()).digest())
+        now = time.monotonic()
+        with self._login_cache_lock:
+            expires_at = self._login_cache.get(cache_key)
+        if expires_at and expires_at > now:
+            return True
+        
+        if not self.db.verify_password(password, stored_hash):
+            return False
+        with self._login_cache_lock:
+            for key in [key for key, expiry in self._login_cache.items() if expiry <= now]:
+                del self._login_cache[key]
+            self._login_cache.pop(cache_key, None)
+            if len(self._login_cache) >= self.LOGIN_CACHE_SIZE:
+                # Insertion order makes the first key the least recently verified
+                del self._login_cache[next(iter(self._login_cache))]
+            self._login_cache[cache_key] = now + self.LOGIN_CACHE_TTL
+        return True
+    
+    def _update_last_login(self, user_id: str, conn: Optional[sqlite3.Connection] = None):
+        if conn is not None:
+            conn.execute(_SQL_UPDATE_LAST_LOGIN, (int(time.time()), user_id))
+            return
+        with self.db.connection(write=True) as conn:
+            self._update_last_login(user_id, conn)
     
     def create_user(self, user_data: Dict) -> Dict:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
         try:
             user_id = str(uuid.uuid4())
             password_hash = self.db.hash_password(user_data['password'])
             
-            cursor.execute('''
-                INSERT INTO users (id, username, email, password_hash, full_name, role, organization, department)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, user_data['username'], user_data['email'], password_hash,
-                  user_data['full_name'], user_data['role'], user_data.get('organization', ''),
-                  user_data.get('department', '')))
+            with self.db.connection(write=True) as conn:
+                conn.execute(_SQL_INSERT_USER, (user_id, user_data['username'], user_data['email'], password_hash,
+                      user_data['full_name'], user_data['role'], user_data.get('organization', ''),
+                      user_data.get('department', '')))
             
-            conn.commit()
-            conn.close()
             return {'success': True, 'user_id': user_id}
         except sqlite3.IntegrityError as e:
-            conn.close()
             return {'success': False, 'error': 'Username or email already exists'}
     
     def get_users_by_organization(self, organization: str) -> List[Dict]:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, username, email, full_name, role, department, is_active, created_at
-            FROM users WHERE organization = ? ORDER BY created_at DESC
-        ''', (organization,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        users = []
-        for result in results:
-            users.append({
-                'id': result[0],
-                'username': result[1],
-                'email': result[2],
-                'full_name': result[3],
-                'role': result[4],
-                'department': result[5],
-                'is_active': result[6],
-                'created_at': result[7]
-            })
-        
-        return users
+        with self.db.borrow_read() as conn:
+            return [dict(r) for r in conn.execute(_SQL_USERS_BY_ORG, (organization,))]
+    
+    def get_users_frame(self, organization: str) -> pd.DataFrame:
+        # Straight from the cursor into columns, with no per-user dict in between
+        with self.db.borrow_read() as conn:
+            return pd.read_sql_query(_SQL_USERS_BY_ORG, conn, params=(organization,))
+    
+    def count_users_by_organization(self, organization: str, days: int = 30) -> Dict[str, int]:
+        with self.db.borrow_read() as conn:
+            total, active, admins, recent = conn.execute(_SQL_ORG_USER_STATS,
+                                                         (organization, f'-{days} day')).fetchone()
+        return {'total': total, 'active': active, 'admins': admins, 'recent': recent}
+    
+    def iter_users_by_organization(self, organization: str, chunk: int = 500) -> Iterator[List[Dict]]:
+        # Yields pages of users so large organizations can render incrementally
+        with self.db.borrow_read() as conn:
+            cursor = conn.execute(_SQL_USERS_BY_ORG, (organization,))
+            while True:
+                rows = cursor.fetchmany(chunk)
+                if not rows:
+                    return
+                yield [dict(r) for r in rows]
+
+@st.cache_resource(show_spinner=False)
+def get_auth_manager() -> AuthenticationManager:
+    # Shared so the login cache survives reruns
+    return AuthenticationManager(get_db())
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_org_users_frame(organization: str) -> pd.DataFrame:
+    return get_auth_manager().get_users_frame(organization)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_org_user_stats(organization: str) -> Dict[str, int]:
+    return get_auth_manager().count_users_by_organization(organization)
 
 # ============================================================================
 # PDF REPORT GENERATOR
 # ============================================================================
 
 class ClinicalPDFGenerator:
+    # Styles are built on first use and shared by every report
+    _BASE_STYLES = None
+    
+    _NOTICE_TEXT = (
+        "This report is generated by STRIVE Pro AI-powered assessment system. "
+        "Results should be interpreted by qualified mental health professionals. "
+        "This report is confidential and intended solely for the named individual."
+    )
+    _GENERATED_BY_TEXT = f"Generated by STRIVE Pro {APP_VERSION}"
+    _DEVELOPED_BY_TEXT = f"Developed by {DEVELOPERS}"
+    
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        if ClinicalPDFGenerator._BASE_STYLES is None:
+            ClinicalPDFGenerator._init_styles()
+        self.styles = self._BASE_STYLES
     
-    def _setup_custom_styles(self):
+    @classmethod
+    def _init_styles(cls):
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import TableStyle
+        from reportlab.lib import colors
+        
+        base_styles = getSampleStyleSheet()
+        
         # Custom styles for clinical reports
-        self.styles.add(ParagraphStyle(
+        base_styles.add(ParagraphStyle(
             name='CustomTitle',
-            parent=self.styles['Heading1'],
+            parent=base_styles['Heading1'],
             fontSize=18,
             spaceAfter=30,
             textColor=colors.darkblue,
             alignment=1  # Center alignment
         ))
         
-        self.styles.add(ParagraphStyle(
+        base_styles.add(ParagraphStyle(
             name='SectionHeader',
-            parent=self.styles['Heading2'],
+            parent=base_styles['Heading2'],
             fontSize=14,
             spaceBefore=20,
             spaceAfter=10,
             textColor=colors.darkblue
         ))
+        
+        cls._PATIENT_TABLE_STYLE = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (1, 0), (1, -1), colors.beige),
+        ])
+        
+        cls._RESULTS_TABLE_STYLE = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+        
+        # Published last so other threads never see a half-built stylesheet
+        cls._BASE_STYLES = base_styles
     
     def generate_clinical_report(self, user_data: Dict, assessment_data: List[Dict], 
-                               ai_insights: Dict) -> bytes:
+                               ai_insights: Dict, report_id: Optional[str] = None,
+                               report_date: Optional[str] = None) -> bytes:
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        self.write_clinical_report(buffer, user_data, assessment_data, ai_insights,
+                                   report_id, report_date)
+        # getvalue() hands back the buffer's bytes without another copy
+        return buffer.getvalue()
+    
+    def write_clinical_report(self, out_stream, user_data: Dict, assessment_data: List[Dict], 
+                              ai_insights: Dict, report_id: Optional[str] = None,
+                              report_date: Optional[str] = None):
+        # Render straight into a caller-owned binary stream (file, BytesIO, ...)
+        # Batch callers pass report_id/report_date so they are computed once per batch
+        if report_id is None:
+            report_id = uuid.uuid4().hex[:8]
+        if report_date is None:
+            report_date = datetime.date.today().strftime('%B %d, %Y')
+        
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+        
+        doc = SimpleDocTemplate(out_stream, pagesize=A4)
         story = []
         
         # Header
@@ -450,20 +904,12 @@ class ClinicalPDFGenerator:
             ['Full Name:', user_data.get('full_name', 'N/A')],
             ['Organization:', user_data.get('organization', 'N/A')],
             ['Department:', user_data.get('department', 'N/A')],
-            ['Report Date:', datetime.datetime.now().strftime('%B %d, %Y')],
-            ['Report ID:', str(uuid.uuid4())[:8]]
+            ['Report Date:', report_date],
+            ['Report ID:', report_id]
         ]
         
         patient_table = Table(patient_data, colWidths=[2*inch, 3*inch])
-        patient_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-        ]))
+        patient_table.setStyle(self._PATIENT_TABLE_STYLE)
         story.append(patient_table)
         story.append(Spacer(1, 20))
         
@@ -488,16 +934,7 @@ class ClinicalPDFGenerator:
                 results_data.append([assessment_type, score, category, risk])
             
             results_table = Table(results_data, colWidths=[2*inch, 1*inch, 2*inch, 1.5*inch])
-            results_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            results_table.setStyle(self._RESULTS_TABLE_STYLE)
             story.append(results_table)
             story.append(Spacer(1, 20))
         
@@ -532,21 +969,22 @@ class ClinicalPDFGenerator:
         
         # Footer
         story.append(Paragraph("Important Notice", self.styles['SectionHeader']))
-        story.append(Paragraph(
-            "This report is generated by STRIVE Pro AI-powered assessment system. "
-            "Results should be interpreted by qualified mental health professionals. "
-            "This report is confidential and intended solely for the named individual.",
-            self.styles['Normal']
-        ))
+        story.append(Paragraph(self._NOTICE_TEXT, self.styles['Normal']))
         
         story.append(Spacer(1, 20))
-        story.append(Paragraph(f"Generated by STRIVE Pro {APP_VERSION}", self.styles['Normal']))
-        story.append(Paragraph(f"Developed by {DEVELOPERS}", self.styles['Normal']))
+        story.append(Paragraph(self._GENERATED_BY_TEXT, self.styles['Normal']))
+        story.append(Paragraph(self._DEVELOPED_BY_TEXT, self.styles['Normal']))
         
         # Build PDF
         doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
+    
+    def generate_many(self, reports: List[Dict]) -> List[bytes]:
+        # reports: dicts with user_data, assessment_data and ai_insights keys.
+        # Rendered serially; no caller batches reports yet, so there is nothing to parallelize against.
+        today_str = datetime.date.today().strftime('%B %d, %Y')
+        return [self.generate_clinical_report(r['user_data'], r['assessment_data'], r['ai_insights'],
+                                              uuid.uuid4().hex[:8], today_str)
+                for r in reports]
     
     def _generate_clinical_recommendations(self, assessment_data: List[Dict], 
                                          ai_insights: Dict) -> List[str]:
@@ -589,6 +1027,21 @@ class ClinicalPDFGenerator:
         
         return recommendations
 
+@st.cache_resource(show_spinner=False)
+def get_pdf_generator() -> ClinicalPDFGenerator:
+    return ClinicalPDFGenerator()
+
+@st.cache_resource(ttl=600, max_entries=64, show_spinner=False)
+def cached_clinical_report(user_json: bytes, assessment_json: bytes, ai_json: bytes) -> bytes:
+    # Keyed on canonical JSON so repeated downloads and emails of one report render it once.
+    # cache_resource hands every caller the same immutable bytes; cache_data would unpickle a copy per hit.
+    return get_pdf_generator().generate_clinical_report(_json_loads(user_json), _json_loads(assessment_json),
+                                                        _json_loads(ai_json))
+
+def build_clinical_report(user: Dict, assessment_data: List[Dict], ai_insights: Dict) -> bytes:
+    return cached_clinical_report(_canonical_json(user), _canonical_json(assessment_data),
+                                  _canonical_json(ai_insights))
+
 # ============================================================================
 # EMAIL AUTOMATION SYSTEM
 # ============================================================================
@@ -602,7 +1055,8 @@ class EmailAutomationSystem:
         self.email_password = ""  # Configure securely
     
     def send_assessment_report(self, user_email: str, user_name: str, 
-                              report_pdf: bytes, subject: str = None):
+                              report_pdf: bytes, subject: str = None,
+                              smtp: Optional[smtplib.SMTP] = None):
         if not subject:
             subject = f"STRIVE Pro - Your Mental Wellness Assessment Report"
         
@@ -646,6 +1100,10 @@ class EmailAutomationSystem:
             part.add_header('Content-Disposition', f'attachment; filename= {filename}')
             msg.attach(part)
             
+            if smtp is not None:
+                smtp.send_message(msg)
+                return True
+            
             # Send email (in production, configure proper SMTP)
             # For demo, we'll just log it
             print(f"Email would be sent to {user_email} with subject: {subject}")
@@ -655,411 +1113,449 @@ class EmailAutomationSystem:
             print(f"Email send error: {e}")
             return False
     
-    def schedule_follow_up_email(self, user_id: str, days_from_now: int):
-        scheduled_date = datetime.datetime.now() + datetime.timedelta(days=days_from_now)
+    def _open_smtp(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        server.starttls()
+        server.login(self.email_user, self.email_password)
+        return server
+    
+    def send_bulk_reports(self, jobs: List[Dict], max_workers: int = 8) -> List[bool]:
+        # jobs: keyword arguments for send_assessment_report, one dict per recipient.
+        # Each worker thread logs in once and reuses its SMTP session for all its jobs.
+        local = threading.local()
+        sessions = []
+        sessions_lock = threading.Lock()
+        
+        def send(job: Dict) -> bool:
+            smtp = None
+            if self.email_password:
+                smtp = getattr(local, 'smtp', None)
+                if smtp is None:
+                    try:
+                        smtp = local.smtp = self._open_smtp()
+                    except (smtplib.SMTPException, OSError) as e:
+                        print(f"SMTP connection error: {e}")
+                        return False
+                    with sessions_lock:
+                        sessions.append(smtp)
+            return self.send_assessment_report(smtp=smtp, **job)
         
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(send, jobs))
+        finally:
+            for smtp in sessions:
+                try:
+                    smtp.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+    
+    def send_report_with_follow_up(self, user: Dict, report_pdf: bytes, subject: str,
+                                   follow_up_days: int) -> bool:
+        # The follow-up is only booked once the report actually went out
+        if not self.send_assessment_report(user['email'], user['full_name'], report_pdf, subject):
+            return False
+        self.schedule_follow_up_email(user['id'], follow_up_days)
+        return True
+    
+    def schedule_follow_up_email(self, user_id: str, days_from_now: int):
+        scheduled_at = int(time.time()) + days_from_now * 86400
         
         notification_id = str(uuid.uuid4())
-        cursor.execute('''
-            INSERT INTO email_notifications (id, user_id, subject, body, scheduled_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (notification_id, user_id, 
-              "STRIVE Pro - Time for Your Follow-up Assessment",
-              "It's time for your next mental wellness assessment. Click here to begin.",
-              scheduled_date.isoformat()))
-        
-        conn.commit()
-        conn.close()
+        with self.db.connection(write=True) as conn:
+            conn.execute(_SQL_INSERT_NOTIFICATION, (notification_id, user_id, 
+                  "STRIVE Pro - Time for Your Follow-up Assessment",
+                  "It's time for your next mental wellness assessment. Click here to begin.",
+                  scheduled_at))
         
         return notification_id
+    
+    def bulk_schedule_follow_ups(self, rows: List[Tuple[str, int]]) -> List[str]:
+        # rows: (user_id, days_from_now); all inserts share one transaction
+        now = int(time.time())
+        notification_ids = []
+        params = []
+        for user_id, days_from_now in rows:
+            notification_id = str(uuid.uuid4())
+            notification_ids.append(notification_id)
+            params.append((notification_id, user_id,
+                           "STRIVE Pro - Time for Your Follow-up Assessment",
+                           "It's time for your next mental wellness assessment. Click here to begin.",
+                           now + days_from_now * 86400))
+        
+        with self.db.connection(write=True) as conn:
+            conn.executemany(_SQL_INSERT_NOTIFICATION, params)
+        
+        return notification_ids
+    
+    def get_due_follow_ups(self, now: Optional[int] = None) -> List[Dict]:
+        # Served by the partial index on pending scheduled_at
+        if now is None:
+            now = int(time.time())
+        with self.db.connection() as conn:
+            return [dict(r) for r in conn.execute(_SQL_DUE_NOTIFICATIONS, (now,))]
+
+@st.cache_resource(show_spinner=False)
+def get_email_system() -> EmailAutomationSystem:
+    return EmailAutomationSystem(get_db())
+
+EMAIL_MAX_WORKERS = 4
+
+@st.cache_resource(show_spinner=False)
+def get_email_executor() -> ThreadPoolExecutor:
+    # SMTP round-trips run here so button handlers return without waiting on the server
+    return ThreadPoolExecutor(max_workers=EMAIL_MAX_WORKERS, thread_name_prefix="email")
+
+def queue_email(send, *args, success_message: str, failure_message: str):
+    # Submit a send callable and track it in the session; show_email_status() reports the outcome
+    future = get_email_executor().submit(send, *args)
+    st.session_state.pending_emails.append((future, success_message, failure_message))
+    st.toast("📨 Email queued for delivery")
+
+def show_email_status():
+    # Surface sends that finished since the last rerun; unfinished ones stay pending
+    still_pending = []
+    for future, success_message, failure_message in st.session_state.pending_emails:
+        if not future.done():
+            still_pending.append((future, success_message, failure_message))
+        elif future.exception() is None and future.result():
+            st.success(success_message)
+        else:
+            st.error(failure_message)
+    st.session_state.pending_emails = still_pending
 
 # ============================================================================
 # ENTERPRISE ANALYTICS ENGINE
 # ============================================================================
 
+# Above this many rows the trend is grouped in-process instead of by SQLite's sort + GROUP BY
+TREND_KERNEL_MIN_ROWS = 100_000
+
+def _group_by_day_numpy(days, weights, n_days):
+    counts = np.bincount(days, minlength=n_days)
+    sums = np.bincount(days, weights=weights, minlength=n_days)
+    return counts, sums
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, nogil=True)
+    def _group_by_day(days, weights, n_days):
+        counts = np.zeros(n_days, np.int64)
+        sums = np.zeros(n_days, np.float64)
+        for i in range(days.shape[0]):
+            counts[days[i]] += 1
+            sums[days[i]] += weights[i]
+        return counts, sums
+else:
+    _group_by_day = _group_by_day_numpy
+
 class EnterpriseAnalytics:
     def __init__(self, db: EnterpriseDatabase):
         self.db = db
     
+    def get_full_dashboard(self, organization: str) -> Dict:
+        # Summary and department bundles in one snapshot on one connection
+        with self.db.snapshot() as conn:
+            return {
+                'summary': self._dashboard_summary(conn, organization),
+                'by_department': self._department_analytics(conn, organization)
+            }
+    
     def get_organization_dashboard_data(self, organization: str) -> Dict:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        # Total users
-        cursor.execute('SELECT COUNT(*) FROM users WHERE organization = ?', (organization,))
-        total_users = cursor.fetchone()[0]
-        
-        # Active users (logged in last 30 days)
+        # Legacy entry point; prefer get_full_dashboard when both views are rendered
+        with self.db.borrow_read() as conn:
+            return self._dashboard_summary(conn, organization)
+    
+    def get_department_analytics(self, organization: str) -> Dict:
+        # Legacy entry point; prefer get_full_dashboard when both views are rendered
+        with self.db.borrow_read() as conn:
+            return self._department_analytics(conn, organization)
+    
+    def _dashboard_summary(self, conn: sqlite3.Connection, organization: str) -> Dict:
         thirty_days_ago = (datetime.datetime.now() - datetime.timedelta(days=30)).isoformat()
-        cursor.execute('''
-            SELECT COUNT(*) FROM users 
-            WHERE organization = ? AND last_login > ?
-        ''', (organization, thirty_days_ago))
-        active_users = cursor.fetchone()[0]
-        
-        # Assessment completion rates
-        cursor.execute('''
-            SELECT COUNT(DISTINCT user_id) FROM assessment_results ar
-            JOIN users u ON ar.user_id = u.id
-            WHERE u.organization = ? AND ar.created_at > ?
-        ''', (organization, thirty_days_ago))
-        users_with_assessments = cursor.fetchone()[0]
         
-        # Risk distribution
-        cursor.execute('''
-            SELECT risk_level, COUNT(*) FROM assessment_results ar
-            JOIN users u ON ar.user_id = u.id
-            WHERE u.organization = ? AND ar.created_at > ?
-            GROUP BY risk_level
-        ''', (organization, thirty_days_ago))
-        risk_data = cursor.fetchall()
+        # Total users and active users (logged in last 30 days)
+        total_users, active_users = conn.execute(
+            _SQL_ORG_USER_COUNTS, (organization, int(time.time()) - 30 * 86400)).fetchone()
         
-        conn.close()
+        # Risk distribution; every row also carries the distinct assessed-user count
+        risk_rows = conn.execute(_SQL_ORG_RISK_SUMMARY, (organization, thirty_days_ago)).fetchall()
+        # Every level is always present so callers can index without defaults
+        risk_data = dict.fromkeys(AIRiskPredictor.RISK_LABELS, 0)
+        for risk_level, count, _ in risk_rows:
+            risk_data[risk_level] = count
+        users_with_assessments = risk_rows[0][2] if risk_rows else 0
         
-        participation_rate = (users_with_assessments / total_users * 100) if total_users > 0 else 0
+        pct_of_users = 100.0 / total_users if total_users else 0.0
         
         return {
             'total_users': total_users,
             'active_users': active_users,
-            'participation_rate': participation_rate,
-            'risk_distribution': dict(risk_data),
-            'engagement_score': (active_users / total_users * 100) if total_users > 0 else 0
+            'participation_rate': users_with_assessments * pct_of_users,
+            'risk_distribution': risk_data,
+            'engagement_score': active_users * pct_of_users
         }
     
-    def get_department_analytics(self, organization: str) -> Dict:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+    def _department_analytics(self, conn: sqlite3.Connection, organization: str) -> Dict:
+        # Structure of arrays: one entry per department, aligned by index
+        results = conn.execute(_SQL_DEPT_ANALYTICS, (organization,)).fetchall()
+        names, totals, assessed, avg_risk = zip(*results) if results else ((), (), (), ())
         
-        cursor.execute('''
-            SELECT u.department, 
-                   COUNT(DISTINCT u.id) as total_users,
-                   COUNT(DISTINCT ar.user_id) as assessed_users,
-                   AVG(CASE WHEN ar.risk_level = 'low' THEN 1
-                            WHEN ar.risk_level = 'moderate' THEN 2
-                            WHEN ar.risk_level = 'high' THEN 3
-                            WHEN ar.risk_level = 'critical' THEN 4
-                            ELSE 2 END) as avg_risk_score
-            FROM users u
-            LEFT JOIN assessment_results ar ON u.id = ar.user_id
-            WHERE u.organization = ?
-            GROUP BY u.department
-        ''', (organization,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        departments = {}
-        for result in results:
-            dept_name = result[0] or 'Unknown'
-            departments[dept_name] = {
-                'total_users': result[1],
-                'assessed_users': result[2],
-                'participation_rate': (result[2] / result[1] * 100) if result[1] > 0 else 0,
-                'avg_risk_score': result[3] or 2.0
-            }
+        totals = np.asarray(totals, dtype=np.int64)
+        assessed = np.asarray(assessed, dtype=np.int64)
+        avg_risk = np.asarray(avg_risk, dtype=np.float64)  # NULL -> nan
+        participation = np.divide(assessed * 100.0, totals, out=np.zeros(len(totals)), where=totals > 0)
         
-        return departments
+        return {
+            'department': [name or 'Unknown' for name in names],
+            'total_users': totals,
+            'assessed_users': assessed,
+            'participation_rate': participation,
+            'avg_risk_score': np.where(np.isnan(avg_risk), 2.0, avg_risk)
+        }
+    
+    def get_department_risk_breakdown(self, organization: str, days: int = 90) -> pd.DataFrame:
+        # Aggregated in SQLite; only one row per (department, risk level) crosses into Python
+        start_date = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat()
+        with self.db.borrow_read() as conn:
+            return pd.read_sql_query(_SQL_DEPT_RISK_BREAKDOWN, conn, params=(organization, start_date))
     
     def get_trend_analysis(self, organization: str, days: int = 90) -> Dict:
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
         start_date = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat()
+        with self.db.borrow_read() as conn:
+            return self._trend_analysis(conn, organization, start_date)
+    
+    def _trend_analysis(self, conn: sqlite3.Connection, organization: str, start_date: str) -> Dict:
+        row_count = conn.execute(_SQL_TREND_COUNT, (organization, start_date)).fetchone()[0]
+        if row_count >= TREND_KERNEL_MIN_ROWS:
+            return self._trend_from_kernel(conn, organization, start_date)
         
-        cursor.execute('''
-            SELECT DATE(ar.created_at) as assessment_date,
-                   COUNT(*) as total_assessments,
-                   AVG(CASE WHEN ar.risk_level = 'low' THEN 1
-                            WHEN ar.risk_level = 'moderate' THEN 2
-                            WHEN ar.risk_level = 'high' THEN 3
-                            WHEN ar.risk_level = 'critical' THEN 4
-                            ELSE 2 END) as avg_risk_level
-            FROM assessment_results ar
-            JOIN users u ON ar.user_id = u.id
-            WHERE u.organization = ? AND ar.created_at > ?
-            GROUP BY DATE(ar.created_at)
-            ORDER BY assessment_date
-        ''', (organization, start_date))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        dates = []
-        assessments = []
-        risk_levels = []
-        
-        for result in results:
-            dates.append(result[0])
-            assessments.append(result[1])
-            risk_levels.append(result[2])
+        # Transpose the (date, count, avg) rows straight off the cursor
+        columns = tuple(zip(*conn.execute(_SQL_TREND_ANALYSIS, (organization, start_date)))) or ((), (), ())
+        dates, assessments, risk_levels = map(list, columns)
         
         return {
             'dates': dates,
             'assessment_counts': assessments,
             'avg_risk_levels': risk_levels
         }
+    
+    def _trend_from_kernel(self, conn: sqlite3.Connection, organization: str, start_date: str) -> Dict:
+        rows = np.array(conn.execute(_SQL_TREND_ROWS, (organization, start_date)).fetchall(),
+                        dtype=np.int64).reshape(-1, 2)
+        first_day = int(rows[:, 0].min())
+        day_index = rows[:, 0] - first_day
+        counts, sums = _group_by_day(day_index, rows[:, 1].astype(np.float64), int(day_index.max()) + 1)
+        
+        active = np.nonzero(counts)[0]
+        epoch = datetime.date(1970, 1, 1)
+        return {
+            'dates': [(epoch + datetime.timedelta(days=first_day + int(d))).isoformat() for d in active],
+            'assessment_counts': counts[active].tolist(),
+            'avg_risk_levels': (sums[active] / counts[active]).tolist()
+        }
+
+@st.cache_resource(show_spinner=False)
+def get_analytics() -> EnterpriseAnalytics:
+    return EnterpriseAnalytics(get_db())
+
+# Analytics caches are keyed by (organization, day) so the 30/90-day windows roll over at midnight
+def _day_bucket() -> str:
+    return datetime.date.today().isoformat()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_full_dashboard(organization: str, day_bucket: str) -> Dict:
+    return get_analytics().get_full_dashboard(organization)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_trend_analysis(organization: str, day_bucket: str, days: int = 90) -> Dict:
+    return get_analytics().get_trend_analysis(organization, days)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_department_risk_breakdown(organization: str, day_bucket: str, days: int = 90) -> pd.DataFrame:
+    return get_analytics().get_department_risk_breakdown(organization, days)
+
+# Every cache whose result depends on who belongs to an organization
+_ORG_MEMBERSHIP_CACHES = (cached_org_users_frame, cached_org_user_stats, cached_full_dashboard)
+
+def _clear_org_membership_caches():
+    # Membership changes are rare, so they drop these caches outright; everything else ages out by TTL
+    for cache in _ORG_MEMBERSHIP_CACHES:
+        cache.clear()
+
+# Analytics page time range selector -> window in days (part of the cache key above)
+ANALYTICS_TIME_RANGES = MappingProxyType({
+    "Last 30 Days": 30,
+    "Last 90 Days": 90,
+    "Last 6 Months": 182,
+    "Last Year": 365,
+})
 
 # ============================================================================
 # SESSION STATE MANAGEMENT
 # ============================================================================
 
-def init_session_state():
+# Immutable defaults; mutable ones are built per session in init_session_state
+_SESSION_DEFAULTS: Tuple[Tuple[str, Any], ...] = (
     # Core app state
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-    if 'current_user' not in st.session_state:
-        st.session_state.current_user = None
-    if 'current_page' not in st.session_state:
-        st.session_state.current_page = 'login'
-    
+    ("authenticated", False),
+    ("current_user", None),
+    ("current_page", "login"),
     # Assessment state
-    if 'current_assessment' not in st.session_state:
-        st.session_state.current_assessment = None
-    if 'current_question' not in st.session_state:
-        st.session_state.current_question = 0
+    ("current_assessment", None),
+    ("current_question", 0),
+    ("assessment_complete", False),
+    ("assessment_outcome", None),
+    # Enterprise features
+    ("selected_organization", None),
+    ("dashboard_data", None),
+)
+
+def init_session_state():
+    for key, value in _SESSION_DEFAULTS:
+        st.session_state.setdefault(key, value)
+    # Mutable defaults are created per session rather than shared through _SESSION_DEFAULTS
     if 'answers' not in st.session_state:
         st.session_state.answers = []
-    if 'assessment_complete' not in st.session_state:
-        st.session_state.assessment_complete = False
-    
-    # Enterprise features
-    if 'selected_organization' not in st.session_state:
-        st.session_state.selected_organization = None
-    if 'dashboard_data' not in st.session_state:
-        st.session_state.dashboard_data = None
+    if 'pending_emails' not in st.session_state:
+        st.session_state.pending_emails = []
 
 # ============================================================================
 # ASSESSMENT LOGIC
 # ============================================================================
 
-def get_assessment_questions(assessment_type: str) -> List[str]:
-    questions = {
-        'pss10': [
-            "Dalam sebulan terakhir, seberapa sering Anda merasa kesal karena hal-hal yang terjadi secara tak terduga?",
-            "Dalam sebulan terakhir, seberapa sering Anda merasa tidak mampu mengendalikan hal-hal penting dalam hidup Anda?",
-            "Dalam sebulan terakhir, seberapa sering Anda merasa gugup dan 'stress'?",
-            "Dalam sebulan terakhir, seberapa sering Anda merasa yakin dengan kemampuan Anda untuk menangani masalah pribadi?",
-            "Dalam sebulan terakhir, seberapa sering Anda merasa bahwa segala sesuatunya berjalan sesuai keinginan Anda?",
-            "Dalam sebulan terakhir, seberapa sering Anda merasa tidak dapat mengatasi semua hal yang harus Anda lakukan?",
-            "Dalam sebulan terakhir, seberapa sering Anda mampu mengendalikan kejengkelan dalam hidup Anda?",
-            "Dalam sebulan terakhir, seberapa sering Anda merasa berada di puncak segalanya?",
-            "Dalam sebulan terakhir, seberapa sering Anda marah karena hal-hal yang berada di luar kendali Anda?",
-            "Dalam sebulan terakhir, seberapa sering Anda merasa bahwa kesulitan menumpuk begitu tinggi sehingga Anda tidak dapat mengatasinya?"
-        ],
-        'dass21': [
-            "Saya merasa sulit untuk bersemangat melakukan sesuatu",
-            "Saya cenderung bereaksi berlebihan terhadap situasi",
-            "Saya mengalami kesulitan untuk rileks",
-            "Saya merasa sedih dan tertekan",
-            "Saya kehilangan minat pada hampir semua hal",
-            "Saya merasa bahwa saya tidak berharga sebagai seseorang",
-            "Saya merasa bahwa hidup tidak berarti",
-            "Saya sulit untuk tenang setelah sesuatu yang mengecewakan terjadi",
-            "Saya merasa mulut saya kering",
-            "Saya tidak dapat mengalami perasaan positif sama sekali",
-            "Saya mengalami kesulitan bernapas",
-            "Saya merasa sulit untuk mengambil inisiatif melakukan sesuatu",
-            "Saya cenderung bereaksi berlebihan",
-            "Saya merasa gemetar",
-            "Saya merasa bahwa saya menggunakan banyak energi mental",
-            "Saya khawatir tentang situasi dimana saya mungkin panik",
-            "Saya merasa tidak ada hal yang dapat ditunggu dengan penuh harapan",
-            "Saya merasa sedih dan tertekan",
-            "Saya merasa tidak sabar ketika mengalami penundaan",
-            "Saya merasa lemas",
-            "Saya merasa bahwa hidup tidak berarti"
-        ],
-        'burnout': [
-            "Saya merasa terkuras secara emosional oleh pekerjaan saya",
-            "Saya merasa lelah ketika bangun tidur dan harus menghadapi hari kerja lainnya",
-            "Bekerja dengan orang-orang sepanjang hari sangat menegangkan bagi saya",
-            "Saya merasa terbakar habis oleh pekerjaan saya",
-            "Saya merasa frustrasi dengan pekerjaan saya",
-            "Saya merasa bekerja terlalu keras dalam pekerjaan saya",
-            "Saya tidak benar-benar peduli dengan apa yang terjadi pada beberapa orang",
-            "Bekerja langsung dengan orang-orang membuat saya stres",
-            "Saya merasa seperti berada di ujung tanduk",
-            "Saya dapat menangani masalah emosional dengan tenang",
-            "Saya merasa diperlakukan seperti benda mati oleh beberapa orang",
-            "Saya merasa sangat berenergi",
-            "Saya merasa frustrasi dengan pekerjaan saya",
-            "Saya merasa bekerja terlalu keras",
-            "Saya benar-benar tidak peduli dengan apa yang terjadi pada beberapa orang"
-        ],
-        'worklife': [
-            "Saya dapat menyeimbangkan antara tuntutan pekerjaan dan kehidupan pribadi dengan baik",
-            "Pekerjaan saya tidak mengganggu kehidupan pribadi saya",
-            "Saya memiliki waktu yang cukup untuk keluarga dan teman-teman",
-            "Saya dapat mengatur waktu untuk hobi dan minat pribadi",
-            "Saya merasa puas dengan keseimbangan antara pekerjaan dan kehidupan pribadi",
-            "Saya mampu memisahkan waktu kerja dan waktu pribadi",
-            "Atasan saya mendukung keseimbangan kerja-hidup karyawan",
-            "Perusahaan memberikan fleksibilitas yang cukup",
-            "Saya tidak merasa bersalah ketika mengambil waktu untuk diri sendiri",
-            "Saya dapat mengatasi stress pekerjaan dengan baik",
-            "Keluarga mendukung komitmen kerja saya",
-            "Saya puas dengan jumlah waktu yang tersedia untuk aktivitas non-kerja"
-        ]
-    }
-    return questions.get(assessment_type, [])
-
-def get_assessment_options(assessment_type: str) -> List[str]:
-    options = {
-        'pss10': ["Tidak Pernah", "Hampir Tidak Pernah", "Kadang-kadang", "Cukup Sering", "Sangat Sering"],
-        'dass21': ["Tidak Pernah", "Kadang-kadang", "Sering", "Sangat Sering"],
-        'burnout': ["Tidak Pernah", "Beberapa kali setahun", "Sebulan sekali", "Beberapa kali sebulan", "Seminggu sekali", "Beberapa kali seminggu", "Setiap hari"],
-        'worklife': ["Sangat Tidak Setuju", "Tidak Setuju", "Netral", "Setuju", "Sangat Setuju"]
-    }
-    return options.get(assessment_type, [])
-
-def calculate_assessment_scores(assessment_type: str, answers: List[int]) -> Dict:
-    if assessment_type == 'pss10':
-        return calculate_pss10_scores(answers)
-    elif assessment_type == 'dass21':
-        return calculate_dass21_scores(answers)
-    elif assessment_type == 'burnout':
-        return calculate_burnout_scores(answers)
-    elif assessment_type == 'worklife':
-        return calculate_worklife_scores(answers)
-    else:
-        return {}
+# Built once at import; every rerun shares the same immutable tuples.
+# Every PSS-10 item shares the same lead-in, so it is stored once.
+_PSS10_PREFIX = "Dalam sebulan terakhir, seberapa sering Anda "
+_PSS10_QUESTIONS = tuple(_PSS10_PREFIX + stem for stem in (
+    "merasa kesal karena hal-hal yang terjadi secara tak terduga?",
+    "merasa tidak mampu mengendalikan hal-hal penting dalam hidup Anda?",
+    "merasa gugup dan 'stress'?",
+    "merasa yakin dengan kemampuan Anda untuk menangani masalah pribadi?",
+    "merasa bahwa segala sesuatunya berjalan sesuai keinginan Anda?",
+    "merasa tidak dapat mengatasi semua hal yang harus Anda lakukan?",
+    "mampu mengendalikan kejengkelan dalam hidup Anda?",
+    "merasa berada di puncak segalanya?",
+    "marah karena hal-hal yang berada di luar kendali Anda?",
+    "merasa bahwa kesulitan menumpuk begitu tinggi sehingga Anda tidak dapat mengatasinya?",
+))
 
-def calculate_pss10_scores(answers: List[int]) -> Dict:
-    reverse_items = [3, 4, 6, 7]
-    total_score = 0
-    
-    for i, answer in enumerate(answers):
-        if i in reverse_items:
-            total_score += (4 - answer)
-        else:
-            total_score += answer
-    
-    if total_score <= 13:
-        category = "Tingkat Stress Rendah"
-        risk_level = "low"
-        color = "#28a745"
-    elif total_score <= 26:
-        category = "Tingkat Stress Sedang"
-        risk_level = "moderate"
-        color = "#ffc107"
-    else:
-        category = "Tingkat Stress Tinggi"
-        risk_level = "high"
-        color = "#dc3545"
-    
-    return {
-        "total_score": total_score,
-        "max_score": 40,
-        "percentage": (total_score / 40) * 100,
-        "category": category,
-        "risk_level": risk_level,
-        "color": color
-    }
+_DASS21_QUESTIONS = (
+    "Saya merasa sulit untuk bersemangat melakukan sesuatu",
+    "Saya cenderung bereaksi berlebihan terhadap situasi",
+    "Saya mengalami kesulitan untuk rileks",
+    "Saya merasa sedih dan tertekan",
+    "Saya kehilangan minat pada hampir semua hal",
+    "Saya merasa bahwa saya tidak berharga sebagai seseorang",
+    "Saya merasa bahwa hidup tidak berarti",
+    "Saya sulit untuk tenang setelah sesuatu yang mengecewakan terjadi",
+    "Saya merasa mulut saya kering",
+    "Saya tidak dapat mengalami perasaan positif sama sekali",
+    "Saya mengalami kesulitan bernapas",
+    "Saya merasa sulit untuk mengambil inisiatif melakukan sesuatu",
+    "Saya cenderung bereaksi berlebihan",
+    "Saya merasa gemetar",
+    "Saya merasa bahwa saya menggunakan banyak energi mental",
+    "Saya khawatir tentang situasi dimana saya mungkin panik",
+    "Saya merasa tidak ada hal yang dapat ditunggu dengan penuh harapan",
+    "Saya merasa sedih dan tertekan",
+    "Saya merasa tidak sabar ketika mengalami penundaan",
+    "Saya merasa lemas",
+    "Saya merasa bahwa hidup tidak berarti",
+)
 
-def calculate_dass21_scores(answers: List[int]) -> Dict:
-    total_score = sum(answers)
-    
-    if total_score <= 20:
-        category = "Normal"
-        risk_level = "low"
-        color = "#28a745"
-    elif total_score <= 40:
-        category = "Ringan"
-        risk_level = "moderate"
-        color = "#ffc107"
-    elif total_score <= 60:
-        category = "Sedang"
-        risk_level = "high"
-        color = "#fd7e14"
-    else:
-        category = "Berat"
-        risk_level = "critical"
-        color = "#dc3545"
-    
-    return {
-        "total_score": total_score,
-        "max_score": 63,
-        "percentage": (total_score / 63) * 100,
-        "category": category,
-        "risk_level": risk_level,
-        "color": color
-    }
+_BURNOUT_QUESTIONS = (
+    "Saya merasa terkuras secara emosional oleh pekerjaan saya",
+    "Saya merasa lelah ketika bangun tidur dan harus menghadapi hari kerja lainnya",
+    "Bekerja dengan orang-orang sepanjang hari sangat menegangkan bagi saya",
+    "Saya merasa terbakar habis oleh pekerjaan saya",
+    "Saya merasa frustrasi dengan pekerjaan saya",
+    "Saya merasa bekerja terlalu keras dalam pekerjaan saya",
+    "Saya tidak benar-benar peduli dengan apa yang terjadi pada beberapa orang",
+    "Bekerja langsung dengan orang-orang membuat saya stres",
+    "Saya merasa seperti berada di ujung tanduk",
+    "Saya dapat menangani masalah emosional dengan tenang",
+    "Saya merasa diperlakukan seperti benda mati oleh beberapa orang",
+    "Saya merasa sangat berenergi",
+    "Saya merasa frustrasi dengan pekerjaan saya",
+    "Saya merasa bekerja terlalu keras",
+    "Saya benar-benar tidak peduli dengan apa yang terjadi pada beberapa orang",
+)
 
-def calculate_burnout_scores(answers: List[int]) -> Dict:
-    total_score = sum(answers)
-    max_score = len(answers) * 6
-    percentage = (total_score / max_score) * 100
-    
-    if percentage <= 30:
-        category = "Burnout Rendah"
-        risk_level = "low"
-        color = "#28a745"
-    elif percentage <= 60:
-        category = "Burnout Sedang"
-        risk_level = "moderate"
-        color = "#ffc107"
-    else:
-        category = "Burnout Tinggi"
-        risk_level = "high"
-        color = "#dc3545"
-    
-    return {
-        "total_score": total_score,
-        "max_score": max_score,
-        "percentage": percentage,
-        "category": category,
-        "risk_level": risk_level,
-        "color": color
-    }
+_WORKLIFE_QUESTIONS = (
+    "Saya dapat menyeimbangkan antara tuntutan pekerjaan dan kehidupan pribadi dengan baik",
+    "Pekerjaan saya tidak mengganggu kehidupan pribadi saya",
+    "Saya memiliki waktu yang cukup untuk keluarga dan teman-teman",
+    "Saya dapat mengatur waktu untuk hobi dan minat pribadi",
+    "Saya merasa puas dengan keseimbangan antara pekerjaan dan kehidupan pribadi",
+    "Saya mampu memisahkan waktu kerja dan waktu pribadi",
+    "Atasan saya mendukung keseimbangan kerja-hidup karyawan",
+    "Perusahaan memberikan fleksibilitas yang cukup",
+    "Saya tidak merasa bersalah ketika mengambil waktu untuk diri sendiri",
+    "Saya dapat mengatasi stress pekerjaan dengan baik",
+    "Keluarga mendukung komitmen kerja saya",
+    "Saya puas dengan jumlah waktu yang tersedia untuk aktivitas non-kerja",
+)
 
-def calculate_worklife_scores(answers: List[int]) -> Dict:
-    total_score = sum(answers)
-    max_score = len(answers) * 4
-    percentage = (total_score / max_score) * 100
-    
-    if percentage >= 75:
-        category = "Work-Life Balance Sangat Baik"
-        risk_level = "low"
-        color = "#28a745"
-    elif percentage >= 60:
-        category = "Work-Life Balance Baik"
-        risk_level = "low"
-        color = "#20c997"
-    elif percentage >= 40:
-        category = "Work-Life Balance Cukup"
-        risk_level = "moderate"
-        color = "#ffc107"
-    else:
-        category = "Work-Life Balance Buruk"
-        risk_level = "high"
-        color = "#dc3545"
-    
-    return {
-        "total_score": total_score,
-        "max_score": max_score,
-        "percentage": percentage,
-        "category": category,
-        "risk_level": risk_level,
-        "color": color
-    }
+_PSS10_OPTIONS = ("Tidak Pernah", "Hampir Tidak Pernah", "Kadang-kadang", "Cukup Sering", "Sangat Sering")
+_DASS21_OPTIONS = ("Tidak Pernah", "Kadang-kadang", "Sering", "Sangat Sering")
+_BURNOUT_OPTIONS = ("Tidak Pernah", "Beberapa kali setahun", "Sebulan sekali", "Beberapa kali sebulan", "Seminggu sekali", "Beberapa kali seminggu", "Setiap hari")
+_WORKLIFE_OPTIONS = ("Sangat Tidak Setuju", "Tidak Setuju", "Netral", "Setuju", "Sangat Setuju")
+
+_QUESTIONS = MappingProxyType({
+    'pss10': _PSS10_QUESTIONS,
+    'dass21': _DASS21_QUESTIONS,
+    'burnout': _BURNOUT_QUESTIONS,
+    'worklife': _WORKLIFE_QUESTIONS
+})
+
+_OPTIONS = MappingProxyType({
+    'pss10': _PSS10_OPTIONS,
+    'dass21': _DASS21_OPTIONS,
+    'burnout': _BURNOUT_OPTIONS,
+    'worklife': _WORKLIFE_OPTIONS
+})
+
+def get_assessment_questions(assessment_type: str) -> Tuple[str, ...]:
+    return _QUESTIONS.get(assessment_type, ())
+
+def get_assessment_options(assessment_type: str) -> Tuple[str, ...]:
+    return _OPTIONS.get(assessment_type, ())
 
 # ============================================================================
 # UI COMPONENTS
 # ============================================================================
 
-def show_login_page():
-    st.markdown("""
+def _render_figure(key: str, build, update) -> None:
+    # Figures persist across reruns; update(fig) pushes new data into the existing
+    # traces and returns False when the figure has to be rebuilt instead. The stable
+    # element key lets the frontend patch the chart rather than remount it.
+    store = f"_fig_{key}"
+    fig = st.session_state.get(store)
+    if fig is None or not update(fig):
+        fig = build()
+        st.session_state[store] = fig
+    st.plotly_chart(fig, use_container_width=True, key=key)
+
+def _update_trace_data(fig, *columns) -> bool:
+    # columns: one dict of trace properties per trace, in trace order
+    if len(fig.data) != len(columns):
+        return False
+    with fig.batch_update():
+        for trace, props in zip(fig.data, columns):
+            trace.update(props)
+    return True
+
+# Static HTML blocks go through st.html, which skips the markdown parser.
+# The login banner is fully resolved at import; the dashboard header is a template.
+_LOGIN_BANNER_HTML = """
     <div style="text-align: center; padding: 3rem 0; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; margin-bottom: 2rem; color: white;">
         <h1 style="font-size: 3.5rem; margin-bottom: 0.5rem; text-shadow: 2px 2px 4px rgba(0,0,0,0.3);">🧠 STRIVE Pro</h1>
         <h2 style="margin: 0; font-weight: 300; text-shadow: 1px 1px 2px rgba(0,0,0,0.3);">Enterprise Mental Wellness Platform</h2>
-        <p style="margin: 1rem 0 0 0; opacity: 0.9; font-size: 1.1rem;">Phase 2 Enterprise Edition - {0}</p>
+        <p style="margin: 1rem 0 0 0; opacity: 0.9; font-size: 1.1rem;">Phase 2 Enterprise Edition - {version}</p>
     </div>
-    """.format(APP_VERSION), unsafe_allow_html=True)
-    
-    # Enterprise Features Banner
-    st.markdown("""
+    """.format(version=APP_VERSION)
+
+_FEATURES_BANNER_HTML = """
     <div style="background: linear-gradient(135deg, #2ecc71 0%, #27ae60 100%); padding: 1.5rem; border-radius: 10px; margin-bottom: 2rem; color: white; text-align: center;">
         <h3 style="margin: 0 0 1rem 0;">🚀 Now Available: Enterprise Features</h3>
         <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; font-size: 0.9rem;">
@@ -1071,7 +1567,60 @@ def show_login_page():
             <div>🔐 Role-Based Access</div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+_DASHBOARD_HEADER_HTML = """
+    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 2rem; border-radius: 10px; margin-bottom: 2rem; color: white;">
+        <h1 style="margin: 0 0 0.5rem 0;">🏢 Enterprise Dashboard</h1>
+        <h3 style="margin: 0; opacity: 0.9;">Welcome back, {full_name} ({role})</h3>
+        <p style="margin: 0.5rem 0 0 0; opacity: 0.8;">{organization} - {department}</p>
+    </div>
+    """
+
+# Display-only metric rows: one st.html element instead of a st.metric per value
+_METRIC_CELL_HTML = """
+        <div>
+            <div style="font-size: 0.875rem; opacity: 0.8;">{0}</div>
+            <div style="font-size: 2.25rem; line-height: 1.2;">{1}</div>{2}
+        </div>"""
+_METRIC_DELTA_HTML = """
+            <div style="font-size: 0.875rem; color: #09ab3b;">↑ {0}</div>"""
+
+def _metric_grid_html(items: Tuple[Tuple[str, str, Optional[str]], ...], columns: Optional[int] = None) -> str:
+    # items: (label, value, delta or None)
+    cells = "".join(_METRIC_CELL_HTML.format(label, value, _METRIC_DELTA_HTML.format(delta) if delta else "")
+                    for label, value, delta in items)
+    return ('<div style="display: grid; grid-template-columns: repeat({0}, 1fr); gap: 1rem; margin: 0.5rem 0;">'
+            '{1}\n    </div>').format(columns or len(items), cells)
+
+_MODEL_METRICS_HTML = _metric_grid_html((
+    ("Model Accuracy", "89.2%", "+2.1%"),
+    ("Prediction Confidence", "94.7%", "+1.5%"),
+    ("Early Detection Rate", "76.3%", "+5.2%"),
+))
+_ASSESSMENT_STATS_HTML = _metric_grid_html((
+    ("Processing Time", "0.34 seconds", None),
+    ("AI Model Version", "v2.1.0", None),
+    ("Clinical Accuracy", "89.2%", None),
+), columns=1)
+
+_AI_INSIGHTS_HTML = """
+    <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 10px; border-left: 4px solid #007bff;">
+        <h4 style="margin: 0 0 1rem 0; color: #007bff;">🧠 AI Analysis Summary</h4>
+        <ul style="margin: 0;">
+            <li><strong>Risk Prediction Accuracy:</strong> 89.2% (trained on 10,000+ assessments)</li>
+            <li><strong>Early Warning System:</strong> 15 users flagged for preventive intervention</li>
+            <li><strong>Trend Prediction:</strong> 23% improvement in mental wellness metrics expected</li>
+            <li><strong>Personalized Interventions:</strong> 156 custom recommendations generated</li>
+        </ul>
+    </div>
+    """
+
+def show_login_page():
+    st.html(_LOGIN_BANNER_HTML)
+    
+    # Enterprise Features Banner
+    st.html(_FEATURES_BANNER_HTML)
     
     col1, col2, col3 = st.columns([1, 2, 1])
     
@@ -1092,9 +1641,7 @@ def show_login_page():
         
         if login_clicked:
             if username and password:
-                db = EnterpriseDatabase()
-                auth = AuthenticationManager(db)
-                user = auth.authenticate_user(username, password)
+                user = get_auth_manager().authenticate_user(username, password)
                 
                 if user:
                     st.session_state.authenticated = True
@@ -1138,13 +1685,7 @@ def show_enterprise_dashboard():
     user = st.session_state.current_user
     
     # Header
-    st.markdown(f"""
-    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 2rem; border-radius: 10px; margin-bottom: 2rem; color: white;">
-        <h1 style="margin: 0 0 0.5rem 0;">🏢 Enterprise Dashboard</h1>
-        <h3 style="margin: 0; opacity: 0.9;">Welcome back, {user['full_name']} ({user['role'].title()})</h3>
-        <p style="margin: 0.5rem 0 0 0; opacity: 0.8;">{user['organization']} - {user['department']}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_DASHBOARD_HEADER_HTML.format_map(dict(user, role=user['role'].title())))
     
     # Navigation
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -1171,16 +1712,26 @@ def show_enterprise_dashboard():
     
     with col5:
         if st.button("🚪 Logout", use_container_width=True):
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
+            st.session_state.clear()
             st.rerun()
     
     st.markdown("---")
     
-    # Load dashboard data
-    db = EnterpriseDatabase()
-    analytics = EnterpriseAnalytics(db)
-    dashboard_data = analytics.get_organization_dashboard_data(user['organization'])
+    # Metrics and trend are fragments: reruns scoped to them skip the rest of the page
+    _dashboard_metrics(user)
+    _dashboard_trend(user)
+    
+    # AI Insights Section
+    st.subheader("🤖 AI-Powered Insights")
+    st.html(_AI_INSIGHTS_HTML)
+
+@st.fragment
+def _dashboard_metrics(user: Dict):
+    import plotly.express as px
+    
+    # Load dashboard data: summary and department views in one round trip
+    full_dashboard = cached_full_dashboard(user['organization'], _day_bucket())
+    dashboard_data = full_dashboard['summary']
     
     # Key Metrics
     st.subheader("📈 Key Metrics")
@@ -1198,7 +1749,7 @@ def show_enterprise_dashboard():
     
     with col4:
         risk_dist = dashboard_data['risk_distribution']
-        high_risk = risk_dist.get('high', 0) + risk_dist.get('critical', 0)
+        high_risk = risk_dist['high'] + risk_dist['critical']
         st.metric("High Risk Users", high_risk)
     
     # Risk Distribution Chart
@@ -1207,65 +1758,61 @@ def show_enterprise_dashboard():
     with col1:
         st.subheader("🎯 Risk Level Distribution")
         risk_data = dashboard_data['risk_distribution']
-        if risk_data:
-            risk_df = pd.DataFrame(list(risk_data.items()), columns=['Risk Level', 'Count'])
-            fig = px.pie(risk_df, values='Count', names='Risk Level', 
-                        color_discrete_map={
-                            'low': '#28a745',
-                            'moderate': '#ffc107', 
-                            'high': '#fd7e14',
-                            'critical': '#dc3545'
-                        })
-            st.plotly_chart(fig, use_container_width=True)
+        if any(risk_data.values()):
+            risk_df = pd.DataFrame({'Risk Level': list(risk_data), 'Count': list(risk_data.values())})
+            labels = tuple(risk_df['Risk Level'])
+            # Slice colours are bound to labels at build time, so a new label set rebuilds
+            _render_figure(
+                'dashboard_risk_pie',
+                lambda: px.pie(risk_df, values='Count', names='Risk Level', 
+                               color_discrete_map={
+                                   'low': '#28a745',
+                                   'moderate': '#ffc107', 
+                                   'high': '#fd7e14',
+                                   'critical': '#dc3545'
+                               }),
+                lambda fig: tuple(fig.data[0].labels) == labels and
+                            _update_trace_data(fig, {'values': risk_df['Count']}))
         else:
             st.info("No assessment data available yet.")
     
     with col2:
         st.subheader("🏢 Department Analytics")
-        dept_data = analytics.get_department_analytics(user['organization'])
-        if dept_data:
-            dept_df = pd.DataFrame([
-                {'Department': dept, 'Users': data['total_users'], 
-                 'Participation': data['participation_rate'],
-                 'Avg Risk': data['avg_risk_score']}
-                for dept, data in dept_data.items()
-            ])
+        dept_data = full_dashboard['by_department']
+        if dept_data['department']:
+            dept_df = pd.DataFrame({
+                'Department': dept_data['department'],
+                'Users': dept_data['total_users'],
+                'Participation': dept_data['participation_rate'],
+                'Avg Risk': dept_data['avg_risk_score']
+            })
             st.dataframe(dept_df, use_container_width=True)
         else:
             st.info("No department data available yet.")
+
+@st.fragment
+def _dashboard_trend(user: Dict):
+    import plotly.graph_objects as go
     
     # Trend Analysis
     st.subheader("📊 Trend Analysis (Last 90 Days)")
-    trend_data = analytics.get_trend_analysis(user['organization'])
+    trend_data = cached_trend_analysis(user['organization'], _day_bucket())
     
     if trend_data['dates']:
-        trend_df = pd.DataFrame({
-            'Date': pd.to_datetime(trend_data['dates']),
-            'Assessments': trend_data['assessment_counts'],
-            'Avg Risk Level': trend_data['avg_risk_levels']
-        })
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=trend_df['Date'], y=trend_df['Assessments'],
-                                mode='lines+markers', name='Daily Assessments'))
-        fig.update_layout(title='Assessment Activity Over Time', height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        # ISO day strings parse straight into datetime64; no DataFrame in between
+        dates = np.asarray(trend_data['dates'], dtype='datetime64[D]')
+        counts = np.asarray(trend_data['assessment_counts'], dtype=np.int64)
+        
+        def build():
+            # Traces and layout in one constructor call: one validation pass, no re-layouts
+            return go.Figure(
+                data=[go.Scatter(x=dates, y=counts, mode='lines+markers', name='Daily Assessments')],
+                layout=dict(title='Assessment Activity Over Time', height=400))
+        
+        _render_figure('dashboard_trend', build,
+                       lambda fig: _update_trace_data(fig, {'x': dates, 'y': counts}))
     else:
         st.info("Complete some assessments to see trend analysis.")
-    
-    # AI Insights Section
-    st.subheader("🤖 AI-Powered Insights")
-    st.markdown("""
-    <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 10px; border-left: 4px solid #007bff;">
-        <h4 style="margin: 0 0 1rem 0; color: #007bff;">🧠 AI Analysis Summary</h4>
-        <ul style="margin: 0;">
-            <li><strong>Risk Prediction Accuracy:</strong> 89.2% (trained on 10,000+ assessments)</li>
-            <li><strong>Early Warning System:</strong> 15 users flagged for preventive intervention</li>
-            <li><strong>Trend Prediction:</strong> 23% improvement in mental wellness metrics expected</li>
-            <li><strong>Personalized Interventions:</strong> 156 custom recommendations generated</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
 
 def show_enterprise_analytics():
     user = st.session_state.current_user
@@ -1279,145 +1826,254 @@ def show_enterprise_analytics():
     
     st.markdown("---")
     
-    # Load analytics data
-    db = EnterpriseDatabase()
-    analytics = EnterpriseAnalytics(db)
-    
-    # Time range selector
-    col1, col2 = st.columns([1, 3])
-    with col1:
-        time_range = st.selectbox("Time Range", ["Last 30 Days", "Last 90 Days", "Last 6 Months", "Last Year"])
-    
-    # Advanced Analytics Tabs
+    # Advanced Analytics Tabs; each tab is a fragment so its widgets rerun only that tab
     tab1, tab2, tab3, tab4 = st.tabs(["Population Health", "Risk Analytics", "Department Insights", "Predictive Models"])
     
     with tab1:
-        st.subheader("🏥 Population Health Metrics")
-        
-        # Generate sample population health data
-        org_data = analytics.get_organization_dashboard_data(user['organization'])
-        
-        # Health Score Distribution
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("**Mental Health Score Distribution**")
-            # Sample data for demonstration
-            health_scores = np.random.normal(75, 15, 100)
-            fig = px.histogram(x=health_scores, nbins=20, title="Population Mental Health Scores")
-            fig.update_traces(marker_color='lightblue')
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            st.markdown("**Wellness Indicators**")
-            indicators = {
-                'Excellent (80-100)': 25,
-                'Good (60-79)': 45,
-                'Fair (40-59)': 20,
-                'Poor (0-39)': 10
-            }
-            fig = px.pie(values=list(indicators.values()), names=list(indicators.keys()))
-            st.plotly_chart(fig, use_container_width=True)
+        _analytics_population_tab(user)
     
     with tab2:
-        st.subheader("⚠️ Risk Analytics & Early Warning")
-        
-        # Risk Heat Map
-        st.markdown("**Risk Heat Map by Department & Time**")
-        
-        # Sample risk heat map data
-        departments = ['IT', 'HR', 'Sales', 'Marketing', 'Finance']
-        weeks = ['Week 1', 'Week 2', 'Week 3', 'Week 4']
-        risk_matrix = np.random.randint(1, 5, (len(departments), len(weeks)))
-        
-        fig = px.imshow(risk_matrix, 
-                       x=weeks, 
-                       y=departments,
-                       color_continuous_scale='RdYlGn_r',
-                       title="Risk Levels Across Departments")
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # High-Risk Alerts
-        st.markdown("**🚨 High-Risk Alerts**")
-        alerts = [
-            {"User": "User_001", "Department": "Sales", "Risk Level": "High", "Last Assessment": "2 days ago"},
-            {"User": "User_045", "Department": "IT", "Risk Level": "Critical", "Last Assessment": "1 day ago"},
-            {"User": "User_023", "Department": "Marketing", "Risk Level": "High", "Last Assessment": "3 days ago"}
-        ]
-        alerts_df = pd.DataFrame(alerts)
-        st.dataframe(alerts_df, use_container_width=True)
+        _analytics_risk_tab(user)
     
     with tab3:
-        st.subheader("🏢 Department-Level Insights")
-        
-        dept_data = analytics.get_department_analytics(user['organization'])
-        
-        if dept_data:
-            # Department comparison
-            dept_comparison = []
-            for dept_name, data in dept_data.items():
-                dept_comparison.append({
-                    'Department': dept_name,
-                    'Total Users': data['total_users'],
-                    'Participation Rate': f"{data['participation_rate']:.1f}%",
-                    'Risk Score': f"{data['avg_risk_score']:.2f}",
-                    'Status': '🟢 Good' if data['avg_risk_score'] < 2.5 else '🟡 Monitor' if data['avg_risk_score'] < 3.5 else '🔴 Action Needed'
-                })
-            
-            dept_df = pd.DataFrame(dept_comparison)
-            st.dataframe(dept_df, use_container_width=True)
-            
-            # Department risk comparison chart
-            fig = px.bar(dept_df, x='Department', y=[float(x) for x in dept_df['Risk Score'].str.replace('', '')], 
-                        title="Average Risk Score by Department")
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No department data available. Complete assessments to see insights.")
+        _analytics_department_tab(user)
     
     with tab4:
-        st.subheader("🤖 AI Predictive Models")
-        
-        # Model Performance Metrics
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Model Accuracy", "89.2%", "+2.1%")
+        _analytics_predictive_tab(user)
+
+@st.cache_data(show_spinner=False)
+def _sample_health_histogram(bins: int = 20) -> Tuple[np.ndarray, np.ndarray, float]:
+    # Sample data for demonstration, binned server-side: the chart ships bins, not samples
+    health_scores = np.random.normal(75, 15, 100)
+    counts, edges = np.histogram(health_scores, bins=bins)
+    return (edges[:-1] + edges[1:]) / 2, counts, float(edges[1] - edges[0])
+
+# Static demo content for the analytics tabs
+_WELLNESS_INDICATORS = MappingProxyType({
+    'Excellent (80-100)': 25,
+    'Good (60-79)': 45,
+    'Fair (40-59)': 20,
+    'Poor (0-39)': 10
+})
+_HEATMAP_DEPARTMENTS = ('IT', 'HR', 'Sales', 'Marketing', 'Finance')
+_HEATMAP_WEEKS = ('Week 1', 'Week 2', 'Week 3', 'Week 4')
+
+@st.cache_data(show_spinner=False)
+def _sample_risk_heatmap(organization: str) -> np.ndarray:
+    # Seeded per organization so the demo heat map is stable across reruns
+    rng = np.random.default_rng(zlib.crc32(organization.encode('utf-8')))
+    return rng.integers(1, 5, (len(_HEATMAP_DEPARTMENTS), len(_HEATMAP_WEEKS)))
+
+@st.cache_data(show_spinner=False)
+def _sample_high_risk_alerts(organization: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "User": ["User_001", "User_045", "User_023"],
+        "Department": ["Sales", "IT", "Marketing"],
+        "Risk Level": ["High", "Critical", "High"],
+        "Last Assessment": ["2 days ago", "1 day ago", "3 days ago"]
+    })
+
+@st.fragment
+def _analytics_population_tab(user: Dict):
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    st.subheader("🏥 Population Health Metrics")
+    
+    # Health Score Distribution
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Mental Health Score Distribution**")
+        centers, counts, bin_width = _sample_health_histogram()
         
-        with col2:
-            st.metric("Prediction Confidence", "94.7%", "+1.5%")
+        def build():
+            fig = go.Figure(go.Bar(x=centers, y=counts, width=bin_width, marker_color='lightblue'))
+            fig.update_layout(title="Population Mental Health Scores", bargap=0)
+            return fig
         
-        with col3:
-            st.metric("Early Detection Rate", "76.3%", "+5.2%")
-        
-        # Prediction Results
-        st.markdown("**12-Week Wellness Trajectory Predictions**")
-        
-        # Sample prediction data
-        weeks = list(range(1, 13))
-        predicted_wellness = [75 + 2*np.sin(w/2) + np.random.normal(0, 2) for w in weeks]
-        confidence_upper = [p + 5 for p in predicted_wellness]
-        confidence_lower = [p - 5 for p in predicted_wellness]
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=weeks, y=predicted_wellness, mode='lines', name='Predicted Wellness Score'))
-        fig.add_trace(go.Scatter(x=weeks, y=confidence_upper, mode='lines', name='Upper Confidence', line=dict(dash='dash')))
-        fig.add_trace(go.Scatter(x=weeks, y=confidence_lower, mode='lines', name='Lower Confidence', line=dict(dash='dash')))
-        fig.update_layout(title='Organizational Wellness Trajectory Forecast', xaxis_title='Weeks', yaxis_title='Wellness Score')
-        st.plotly_chart(fig, use_container_width=True)
+        _render_figure('analytics_health_histogram', build,
+                       lambda fig: _update_trace_data(fig, {'x': centers, 'y': counts, 'width': bin_width}))
+    
+    with col2:
+        st.markdown("**Wellness Indicators**")
+        # Constant data: the stored figure never needs updating
+        _render_figure('analytics_wellness_indicators',
+                       lambda: px.pie(values=list(_WELLNESS_INDICATORS.values()),
+                                      names=list(_WELLNESS_INDICATORS)),
+                       lambda fig: True)
+
+@st.fragment
+def _analytics_risk_tab(user: Dict):
+    import plotly.express as px
+    
+    st.subheader("⚠️ Risk Analytics & Early Warning")
+    
+    # Risk Heat Map
+    st.markdown("**Risk Heat Map by Department & Time**")
+    
+    # Sample risk heat map data
+    risk_matrix = _sample_risk_heatmap(user['organization'])
+    
+    _render_figure(
+        'analytics_risk_heatmap',
+        lambda: px.imshow(risk_matrix, 
+                          x=list(_HEATMAP_WEEKS), 
+                          y=list(_HEATMAP_DEPARTMENTS),
+                          color_continuous_scale='RdYlGn_r',
+                          title="Risk Levels Across Departments"),
+        lambda fig: _update_trace_data(fig, {'z': risk_matrix}))
+    
+    # High-Risk Alerts
+    st.markdown("**🚨 High-Risk Alerts**")
+    st.dataframe(_sample_high_risk_alerts(user['organization']), use_container_width=True)
+
+@st.fragment
+def _analytics_department_tab(user: Dict):
+    import plotly.express as px
+    
+    st.subheader("🏢 Department-Level Insights")
+    
+    # Only this tab reads the time range, so changing it reruns just this fragment
+    time_range = st.selectbox("Time Range", list(ANALYTICS_TIME_RANGES))
+    range_days = ANALYTICS_TIME_RANGES[time_range]
+    
+    dept_data = cached_full_dashboard(user['organization'], _day_bucket())['by_department']
+    
+    if dept_data['department']:
+        # Department comparison
+        risk_scores = dept_data['avg_risk_score']
+        dept_df = pd.DataFrame({
+            'Department': dept_data['department'],
+            'Total Users': dept_data['total_users'],
+            'Participation Rate': dept_data['participation_rate'],
+            'Risk Score': risk_scores,
+            'Status': np.select([risk_scores < 2.5, risk_scores < 3.5],
+                                ['🟢 Good', '🟡 Monitor'], default='🔴 Action Needed')
+        })
+        # Columns stay float64; formatting happens only in the rendered table
+        st.dataframe(dept_df, use_container_width=True, column_config={
+            'Participation Rate': st.column_config.NumberColumn(format="%.1f%%"),
+            'Risk Score': st.column_config.NumberColumn(format="%.2f")
+        })
         
-        # AI Recommendations
-        st.markdown("**🎯 AI-Generated Recommendations**")
-        st.markdown("""
-        <div style="background: #e8f4f8; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
-            <h4 style="color: #0066cc; margin: 0 0 0.5rem 0;">🤖 AI Insights</h4>
-            <ul style="margin: 0;">
-                <li><strong>High Impact Action:</strong> Implement stress management workshops for Sales department (predicted 15% wellness improvement)</li>
-                <li><strong>Preventive Measure:</strong> Schedule proactive check-ins for 12 users showing early risk indicators</li>
-                <li><strong>Resource Allocation:</strong> Increase mental health support budget by 8% for optimal ROI</li>
-                <li><strong>Timing Optimization:</strong> Best intervention period: Next 2-4 weeks for maximum effectiveness</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        # Department risk comparison chart
+        _render_figure(
+            'analytics_dept_risk',
+            lambda: px.bar(x=dept_data['department'], y=risk_scores,
+                           labels={'x': 'Department', 'y': 'Risk Score'},
+                           title="Average Risk Score by Department"),
+            lambda fig: _update_trace_data(fig, {'x': dept_data['department'], 'y': risk_scores}))
+        
+        # Risk level mix per department
+        breakdown = cached_department_risk_breakdown(user['organization'], _day_bucket(), range_days)
+        if not breakdown.empty:
+            fig = px.bar(breakdown, x='department', y='assessments', color='risk_level',
+                        labels={'department': 'Department', 'assessments': 'Assessments', 'risk_level': 'Risk Level'},
+                        title="Risk Level Mix by Department")
+            st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("No department data available. Complete assessments to see insights.")
+
+@st.fragment
+def _analytics_predictive_tab(user: Dict):
+    import plotly.graph_objects as go
+    
+    st.subheader("🤖 AI Predictive Models")
+    
+    # Model Performance Metrics
+    st.html(_MODEL_METRICS_HTML)
+    
+    # Prediction Results
+    st.markdown("**12-Week Wellness Trajectory Predictions**")
+    
+    # Sample prediction data
+    weeks = np.arange(1, 13)
+    predicted_wellness = 75 + 2*np.sin(weeks/2) + np.random.normal(0, 2, size=weeks.size)
+    confidence_upper = predicted_wellness + 5
+    confidence_lower = predicted_wellness - 5
+    
+    def build():
+        return go.Figure(
+            data=[
+                go.Scatter(x=weeks, y=predicted_wellness, mode='lines', name='Predicted Wellness Score'),
+                go.Scatter(x=weeks, y=confidence_upper, mode='lines', name='Upper Confidence', line=dict(dash='dash')),
+                go.Scatter(x=weeks, y=confidence_lower, mode='lines', name='Lower Confidence', line=dict(dash='dash'))
+            ],
+            layout=dict(title='Organizational Wellness Trajectory Forecast',
+                        xaxis_title='Weeks', yaxis_title='Wellness Score'))
+    
+    _render_figure('analytics_wellness_forecast', build,
+                   lambda fig: _update_trace_data(fig, {'y': predicted_wellness},
+                                                  {'y': confidence_upper}, {'y': confidence_lower}))
+    
+    # AI Recommendations
+    st.markdown("**🎯 AI-Generated Recommendations**")
+    st.markdown("""
+    <div style="background: #e8f4f8; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
+        <h4 style="color: #0066cc; margin: 0 0 0.5rem 0;">🤖 AI Insights</h4>
+        <ul style="margin: 0;">
+            <li><strong>High Impact Action:</strong> Implement stress management workshops for Sales department (predicted 15% wellness improvement)</li>
+            <li><strong>Preventive Measure:</strong> Schedule proactive check-ins for 12 users showing early risk indicators</li>
+            <li><strong>Resource Allocation:</strong> Increase mental health support budget by 8% for optimal ROI</li>
+            <li><strong>Timing Optimization:</strong> Best intervention period: Next 2-4 weeks for maximum effectiveness</li>
+        </ul>
+    </div>
+    """, unsafe_allow_html=True)
+
+# Assessment picker entries; built once, question counts taken from the question sets
+_ASSESSMENT_CATALOG = MappingProxyType({
+    'pss10': MappingProxyType({
+        'name': 'Perceived Stress Scale (PSS-10)',
+        'description': 'AI-enhanced stress assessment with predictive risk modeling',
+        'questions': len(_QUESTIONS['pss10']),
+        'time': '5-7 minutes',
+        'icon': '😰',
+        'features': ('AI Risk Prediction', 'Personalized Insights', 'Clinical Interpretation')
+    }),
+    'dass21': MappingProxyType({
+        'name': 'Depression Anxiety Stress Scale (DASS-21)',
+        'description': 'Comprehensive mental health screening with ML-powered analysis',
+        'questions': len(_QUESTIONS['dass21']),
+        'time': '10-15 minutes',
+        'icon': '🧠',
+        'features': ('Multi-dimensional Analysis', 'Risk Stratification', 'Intervention Recommendations')
+    }),
+    'burnout': MappingProxyType({
+        'name': 'Maslach Burnout Inventory',
+        'description': 'Workplace burnout assessment with predictive analytics',
+        'questions': len(_QUESTIONS['burnout']),
+        'time': '8-10 minutes',
+        'icon': '💼',
+        'features': ('Workplace Focus', 'Burnout Prediction', 'Recovery Recommendations')
+    }),
+    'worklife': MappingProxyType({
+        'name': 'Work-Life Balance Scale',
+        'description': 'Comprehensive work-life balance evaluation with AI insights',
+        'questions': len(_QUESTIONS['worklife']),
+        'time': '6-8 minutes',
+        'icon': '⚖️',
+        'features': ('Balance Analysis', 'Lifestyle Recommendations', 'Productivity Insights')
+    }),
+})
+
+def _save_answer_and_advance(current_q: int, total_questions: int):
+    st.session_state.answers[current_q] = st.session_state[f'q_{current_q}']
+    
+    if current_q == total_questions - 1:
+        st.session_state.assessment_complete = True
+    else:
+        st.session_state.current_question += 1
+
+def _previous_question():
+    st.session_state.current_question -= 1
+
+def _leave_assessment():
+    # Also used by the results page's New Assessment button
+    st.session_state.current_assessment = None
+    st.session_state.current_question = 0
+    st.session_state.answers = []
+    st.session_state.assessment_complete = False
 
 def show_assessment_interface():
     user = st.session_state.current_user
@@ -1440,42 +2096,7 @@ def show_assessment_interface():
         </div>
         """, unsafe_allow_html=True)
         
-        assessments = {
-            'pss10': {
-                'name': 'Perceived Stress Scale (PSS-10)',
-                'description': 'AI-enhanced stress assessment with predictive risk modeling',
-                'questions': 10,
-                'time': '5-7 minutes',
-                'icon': '😰',
-                'features': ['AI Risk Prediction', 'Personalized Insights', 'Clinical Interpretation']
-            },
-            'dass21': {
-                'name': 'Depression Anxiety Stress Scale (DASS-21)',
-                'description': 'Comprehensive mental health screening with ML-powered analysis',
-                'questions': 21,
-                'time': '10-15 minutes',
-                'icon': '🧠',
-                'features': ['Multi-dimensional Analysis', 'Risk Stratification', 'Intervention Recommendations']
-            },
-            'burnout': {
-                'name': 'Maslach Burnout Inventory',
-                'description': 'Workplace burnout assessment with predictive analytics',
-                'questions': 15,
-                'time': '8-10 minutes',
-                'icon': '💼',
-                'features': ['Workplace Focus', 'Burnout Prediction', 'Recovery Recommendations']
-            },
-            'worklife': {
-                'name': 'Work-Life Balance Scale',
-                'description': 'Comprehensive work-life balance evaluation with AI insights',
-                'questions': 12,
-                'time': '6-8 minutes',
-                'icon': '⚖️',
-                'features': ['Balance Analysis', 'Lifestyle Recommendations', 'Productivity Insights']
-            }
-        }
-        
-        for key, assessment in assessments.items():
+        for key, assessment in _ASSESSMENT_CATALOG.items():
             with st.expander(f"{assessment['icon']} **{assessment['name']}**", expanded=False):
                 col1, col2 = st.columns([3, 1])
                 
@@ -1491,8 +2112,10 @@ def show_assessment_interface():
                     if st.button(f'Start {key.upper()}', key=f'start_{key}', use_container_width=True):
                         st.session_state.current_assessment = key
                         st.session_state.current_question = 0
-                        st.session_state.answers = []
+                        # One int8 slot per question; -1 marks unanswered
+                        st.session_state.answers = np.full(assessment['questions'], -1, dtype=np.int8)
                         st.session_state.assessment_complete = False
+                        st.session_state.assessment_outcome = None
                         st.rerun()
     
     elif not st.session_state.assessment_complete:
@@ -1523,71 +2146,140 @@ def show_assessment_interface():
             st.subheader(f'Question {current_q + 1}')
             st.markdown(f'### {questions[current_q]}')
             
-            # Answer options
-            answer = st.radio(
-                'Select your response:',
-                range(len(options)),
-                format_func=lambda x: options[x],
-                key=f'q_{current_q}'
-            )
-            
-            st.markdown('---')
-            
-            # Navigation
-            col1, col2, col3 = st.columns([1, 1, 1])
-            
-            with col1:
-                if current_q > 0:
-                    if st.button('⬅️ Previous', use_container_width=True):
-                        st.session_state.current_question -= 1
-                        st.rerun()
-            
-            with col2:
-                if st.button('🏠 Main Menu', use_container_width=True):
-                    st.session_state.current_assessment = None
-                    st.session_state.current_question = 0
-                    st.session_state.answers = []
-                    st.rerun()
-            
-            with col3:
-                button_text = '🤖 Complete & Analyze' if current_q == total_questions - 1 else '➡️ Next'
-                if st.button(button_text, type='primary', use_container_width=True):
-                    # Save answer
-                    if current_q == len(st.session_state.answers):
-                        st.session_state.answers.append(answer)
-                    else:
-                        st.session_state.answers[current_q] = answer
-                    
-                    if current_q == total_questions - 1:
-                        st.session_state.assessment_complete = True
-                        st.rerun()
-                    else:
-                        st.session_state.current_question += 1
-                        st.rerun()
+            # The form holds the radio's value client-side until a button submits it,
+            # so picking an option does not rerun the script
+            with st.form(f'q_{current_q}_form', border=False):
+                # Answer options
+                st.radio(
+                    'Select your response:',
+                    range(len(options)),
+                    format_func=lambda x: options[x],
+                    key=f'q_{current_q}'
+                )
+                
+                st.markdown('---')
+                
+                # Navigation
+                col1, col2, col3 = st.columns([1, 1, 1])
+                
+                # Callbacks update state before the click's own rerun, so no st.rerun() is needed
+                with col1:
+                    if current_q > 0:
+                        st.form_submit_button('⬅️ Previous', use_container_width=True, on_click=_previous_question)
+                
+                with col2:
+                    st.form_submit_button('🏠 Main Menu', use_container_width=True, on_click=_leave_assessment)
+                
+                with col3:
+                    button_text = '🤖 Complete & Analyze' if current_q == total_questions - 1 else '➡️ Next'
+                    st.form_submit_button(button_text, type='primary', use_container_width=True,
+                                          on_click=_save_answer_and_advance, args=(current_q, total_questions))
         else:
             st.session_state.assessment_complete = True
-            st.rerun()
+            show_ai_enhanced_results()
     
     else:
         # Results with AI analysis
         show_ai_enhanced_results()
 
-def show_ai_enhanced_results():
-    user = st.session_state.current_user
-    assessment_type = st.session_state.current_assessment
-    answers = st.session_state.answers
+_RISK_COLORS = MappingProxyType({'low': '#28a745', 'moderate': '#ffc107', 'high': '#fd7e14', 'critical': '#dc3545'})
+
+_RISK_BANNER_HTML = """
+    <div style="background-color: {color}; color: white; padding: 2rem; border-radius: 15px; text-align: center; margin: 2rem 0;">
+        <h2 style="margin: 0 0 1rem 0;">🎯 Risk Level: {risk_level}</h2>
+        <h3 style="margin: 0 0 1rem 0;">Traditional Category: {category}</h3>
+        <p style="margin: 0; font-size: 1.1rem; opacity: 0.9;">AI Confidence: {confidence:.1f}%</p>
+    </div>
+    """
+
+_INSIGHT_ITEM_HTML = """
+        <div style="background: #e8f4f8; padding: 1rem; border-radius: 8px; margin: 0.5rem 0; border-left: 4px solid #0066cc;">
+            <strong>{0}.</strong> {1}
+        </div>
+        """
+
+# Personalized recommendations by AI risk level; unknown levels fall back to 'low'
+_RECS_BY_LEVEL = MappingProxyType({
+    'critical': (
+        "🚨 Immediate Action: Schedule appointment with mental health professional within 48 hours",
+        "📞 Crisis Support: Contact employee assistance program or crisis hotline if needed",
+        "⏰ Monitoring: Daily check-ins recommended for next 7 days",
+        "🏥 Clinical Referral: Consider psychiatric evaluation for comprehensive treatment plan",
+        "👥 Support Network: Inform trusted colleague or supervisor about need for support",
+    ),
+    'high': (
+        "📅 Professional Consultation: Schedule appointment with counselor within 1-2 weeks",
+        "🧘 Stress Management: Implement daily stress reduction techniques (meditation, breathing exercises)",
+        "💤 Sleep Hygiene: Prioritize 7-9 hours of quality sleep nightly",
+        "🏃 Physical Activity: Engage in 30 minutes of moderate exercise 5 days per week",
+        "⚖️ Work Boundaries: Establish clear work-life boundaries and consider workload adjustments",
+    ),
+    'moderate': (
+        "🎯 Preventive Care: Consider preventive counseling or coaching sessions",
+        "📱 Self-Monitoring: Use wellness apps to track mood and stress levels",
+        "🤝 Social Connection: Strengthen relationships with family, friends, and colleagues",
+        "📚 Skill Building: Learn stress management and resilience-building techniques",
+        "🌱 Lifestyle: Focus on maintaining healthy diet, exercise, and sleep routines",
+    ),
+    'low': (
+        "✅ Maintain Current Practices: Continue current positive mental health strategies",
+        "🔄 Regular Assessment: Complete follow-up assessments as scheduled",
+        "🌟 Peer Support: Consider mentoring colleagues who may be struggling",
+        "📈 Growth Opportunities: Explore leadership or wellness ambassador roles",
+        "🎯 Optimization: Fine-tune current wellness practices for continued improvement",
+    ),
+})
+
+def _assessment_outcome(user: Dict, assessment_type: str, answers: List[int]) -> Tuple[Dict, Dict]:
+    # Scored, predicted and saved once per completed assessment; reruns triggered by
+    # the result page's buttons reuse the stored outcome
+    key = (assessment_type, tuple(answers))
+    outcome = st.session_state.assessment_outcome
+    if outcome is not None and outcome[0] == key:
+        return outcome[1], outcome[2]
     
     # Calculate traditional scores
     scores = calculate_assessment_scores(assessment_type, answers)
     
     # AI Risk Prediction
-    ai_predictor = AIRiskPredictor()
     assessment_data = {
         'age': 35,  # Could be collected from user profile
         f'{assessment_type}_score': scores['total_score'],
         'previous_assessments': 1
     }
-    ai_insights = ai_predictor.predict_risk(assessment_data)
+    ai_insights = get_risk_predictor().predict_risk(assessment_data)
+    
+    # Save results to database; the batch path keeps one insert statement and transaction for all callers
+    try:
+        get_db().bulk_insert_assessment_results([
+            (user['id'], assessment_type, scores, ai_insights['risk_level'], ai_insights)
+        ])
+    except Exception as e:
+        st.error(f"Error saving results: {e}")
+    
+    st.session_state.assessment_outcome = (key, scores, ai_insights)
+    return scores, ai_insights
+
+def _report_assessment_data(assessment_type: str, scores: Dict, ai_insights: Dict,
+                            today: datetime.date) -> List[Dict]:
+    # Single-assessment payload shared by the PDF and email actions. Day precision keeps
+    # the cached report key stable across clicks; the PDF does not print the time.
+    return [{
+        'type': assessment_type,
+        'scores': scores,
+        'risk_level': ai_insights['risk_level'],
+        'date': today.isoformat()
+    }]
+
+def show_ai_enhanced_results():
+    import plotly.express as px
+    
+    user = st.session_state.current_user
+    assessment_type = st.session_state.current_assessment
+    # Captured once per render for the follow-up date, report payload and file name
+    today = datetime.date.today()
+    # Scored as Python ints: int8 sums would overflow on the longer instruments
+    scores, ai_insights = _assessment_outcome(user, assessment_type, st.session_state.answers.tolist())
     
     # Header
     st.markdown("""
@@ -1614,16 +2306,12 @@ def show_ai_enhanced_results():
                  f"{ai_insights['confidence']*100:.1f}% confidence")
     
     # Visual Risk Indicator
-    risk_color = {'low': '#28a745', 'moderate': '#ffc107', 'high': '#fd7e14', 'critical': '#dc3545'}
-    current_color = risk_color.get(ai_insights['risk_level'], '#ffc107')
-    
-    st.markdown(f"""
-    <div style="background-color: {current_color}; color: white; padding: 2rem; border-radius: 15px; text-align: center; margin: 2rem 0;">
-        <h2 style="margin: 0 0 1rem 0;">🎯 Risk Level: {ai_insights['risk_level'].upper()}</h2>
-        <h3 style="margin: 0 0 1rem 0;">Traditional Category: {scores['category']}</h3>
-        <p style="margin: 0; font-size: 1.1rem; opacity: 0.9;">AI Confidence: {ai_insights['confidence']*100:.1f}%</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_RISK_BANNER_HTML.format_map({
+        'color': _RISK_COLORS.get(ai_insights['risk_level'], '#ffc107'),
+        'risk_level': ai_insights['risk_level'].upper(),
+        'category': scores['category'],
+        'confidence': ai_insights['confidence'] * 100
+    }), unsafe_allow_html=True)
     
     # AI Risk Probabilities
     st.subheader("🤖 AI Risk Probability Analysis")
@@ -1632,8 +2320,10 @@ def show_ai_enhanced_results():
     with col1:
         # Risk probability chart
         risk_probs = ai_insights['risk_probabilities']
-        prob_df = pd.DataFrame(list(risk_probs.items()), columns=['Risk Level', 'Probability'])
-        prob_df['Probability'] = prob_df['Probability'] * 100
+        prob_df = pd.DataFrame({
+            'Risk Level': list(risk_probs),
+            'Probability': np.fromiter(risk_probs.values(), dtype=np.float64, count=len(risk_probs)) * 100
+        })
         
         fig = px.bar(prob_df, x='Risk Level', y='Probability', 
                     title='AI Risk Prediction Probabilities',
@@ -1650,7 +2340,7 @@ def show_ai_enhanced_results():
     with col2:
         # Next assessment recommendation
         next_days = ai_insights['next_assessment_recommended']
-        next_date = (datetime.datetime.now() + datetime.timedelta(days=next_days)).strftime('%B %d, %Y')
+        next_date = f"{today + datetime.timedelta(days=next_days):%B %d, %Y}"
         
         st.markdown(f"""
         <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 10px; border-left: 4px solid #007bff;">
@@ -1663,120 +2353,57 @@ def show_ai_enhanced_results():
         
         # Quick stats
         st.markdown("### 📊 Assessment Statistics")
-        st.metric("Processing Time", "0.34 seconds")
-        st.metric("AI Model Version", "v2.1.0")
-        st.metric("Clinical Accuracy", "89.2%")
+        st.html(_ASSESSMENT_STATS_HTML)
     
     # AI Insights
     st.subheader("🧠 AI-Generated Insights")
-    for i, insight in enumerate(ai_insights['insights'], 1):
-        st.markdown(f"""
-        <div style="background: #e8f4f8; padding: 1rem; border-radius: 8px; margin: 0.5rem 0; border-left: 4px solid #0066cc;">
-            <strong>{i}.</strong> {insight}
-        </div>
-        """, unsafe_allow_html=True)
+    st.html("".join(_INSIGHT_ITEM_HTML.format(i, insight)
+                    for i, insight in enumerate(ai_insights['insights'], 1)))
     
     # Personalized Recommendations
     st.subheader("💡 Personalized Recommendations")
     
-    # Generate personalized recommendations based on AI analysis
-    recommendations = []
-    risk_level = ai_insights['risk_level']
-    
-    if risk_level == 'critical':
-        recommendations = [
-            "🚨 Immediate Action: Schedule appointment with mental health professional within 48 hours",
-            "📞 Crisis Support: Contact employee assistance program or crisis hotline if needed",
-            "⏰ Monitoring: Daily check-ins recommended for next 7 days",
-            "🏥 Clinical Referral: Consider psychiatric evaluation for comprehensive treatment plan",
-            "👥 Support Network: Inform trusted colleague or supervisor about need for support"
-        ]
-    elif risk_level == 'high':
-        recommendations = [
-            "📅 Professional Consultation: Schedule appointment with counselor within 1-2 weeks",
-            "🧘 Stress Management: Implement daily stress reduction techniques (meditation, breathing exercises)",
-            "💤 Sleep Hygiene: Prioritize 7-9 hours of quality sleep nightly",
-            "🏃 Physical Activity: Engage in 30 minutes of moderate exercise 5 days per week",
-            "⚖️ Work Boundaries: Establish clear work-life boundaries and consider workload adjustments"
-        ]
-    elif risk_level == 'moderate':
-        recommendations = [
-            "🎯 Preventive Care: Consider preventive counseling or coaching sessions",
-            "📱 Self-Monitoring: Use wellness apps to track mood and stress levels",
-            "🤝 Social Connection: Strengthen relationships with family, friends, and colleagues",
-            "📚 Skill Building: Learn stress management and resilience-building techniques",
-            "🌱 Lifestyle: Focus on maintaining healthy diet, exercise, and sleep routines"
-        ]
-    else:
-        recommendations = [
-            "✅ Maintain Current Practices: Continue current positive mental health strategies",
-            "🔄 Regular Assessment: Complete follow-up assessments as scheduled",
-            "🌟 Peer Support: Consider mentoring colleagues who may be struggling",
-            "📈 Growth Opportunities: Explore leadership or wellness ambassador roles",
-            "🎯 Optimization: Fine-tune current wellness practices for continued improvement"
-        ]
+    recommendations = _RECS_BY_LEVEL.get(ai_insights['risk_level'], _RECS_BY_LEVEL['low'])
     
-    for rec in recommendations:
-        st.markdown(f"• {rec}")
+    # Blank-line separated so each bullet stays its own paragraph
+    st.markdown("\n\n".join(f"• {rec}" for rec in recommendations))
     
     # Action Buttons
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
     
+    # Outcome of emails queued on earlier reruns
+    show_email_status()
+    
     with col1:
         if st.button('📄 Generate Clinical Report', use_container_width=True, type="primary"):
-            # Generate PDF report
-            pdf_generator = ClinicalPDFGenerator()
-            
-            # Prepare data for report
-            assessment_data = [{
-                'type': assessment_type,
-                'scores': scores,
-                'risk_level': ai_insights['risk_level'],
-                'date': datetime.datetime.now().isoformat()
-            }]
-            
-            pdf_data = pdf_generator.generate_clinical_report(user, assessment_data, ai_insights)
+            assessment_data = _report_assessment_data(assessment_type, scores, ai_insights, today)
+            pdf_data = build_clinical_report(user, assessment_data, ai_insights)
             
             st.download_button(
                 label='📥 Download Clinical PDF',
                 data=pdf_data,
-                file_name=f'strive_clinical_report_{datetime.date.today().strftime("%Y%m%d")}.pdf',
+                file_name=f'strive_clinical_report_{today:%Y%m%d}.pdf',
                 mime='application/pdf'
             )
             st.success("✅ Clinical-grade PDF report generated!")
     
     with col2:
         if st.button('📧 Email Report', use_container_width=True):
-            # Email automation
-            email_system = EmailAutomationSystem(EnterpriseDatabase())
-            
             # Generate report first
-            pdf_generator = ClinicalPDFGenerator()
-            assessment_data = [{
-                'type': assessment_type,
-                'scores': scores,
-                'risk_level': ai_insights['risk_level'],
-                'date': datetime.datetime.now().isoformat()
-            }]
-            pdf_data = pdf_generator.generate_clinical_report(user, assessment_data, ai_insights)
+            assessment_data = _report_assessment_data(assessment_type, scores, ai_insights, today)
+            pdf_data = build_clinical_report(user, assessment_data, ai_insights)
             
-            # Send email
-            success = email_system.send_assessment_report(
-                user['email'], 
-                user['full_name'], 
+            # Send email and schedule the follow-up in the background
+            queue_email(
+                get_email_system().send_report_with_follow_up,
+                user,
                 pdf_data,
-                f"STRIVE Pro - AI-Enhanced Assessment Results ({assessment_type.upper()})"
+                f"STRIVE Pro - AI-Enhanced Assessment Results ({assessment_type.upper()})",
+                ai_insights['next_assessment_recommended'],
+                success_message=f"✅ Report emailed successfully! 📅 Follow-up reminder scheduled for {next_date}",
+                failure_message="❌ Email sending failed. Please try again."
             )
-            
-            if success:
-                st.success("✅ Report emailed successfully!")
-                
-                # Schedule follow-up email
-                email_system.schedule_follow_up_email(user['id'], ai_insights['next_assessment_recommended'])
-                st.info(f"📅 Follow-up reminder scheduled for {next_date}")
-            else:
-                st.error("❌ Email sending failed. Please try again.")
     
     with col3:
         if st.button('📅 Schedule Follow-up', use_container_width=True):
@@ -1784,35 +2411,23 @@ def show_ai_enhanced_results():
             st.balloons()
     
     with col4:
-        if st.button('🔄 New Assessment', use_container_width=True):
-            # Reset for new assessment
-            st.session_state.current_assessment = None
-            st.session_state.current_question = 0
-            st.session_state.answers = []
-            st.session_state.assessment_complete = False
-            st.rerun()
-    
-    # Save results to database
-    try:
-        db = EnterpriseDatabase()
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        result_id = str(uuid.uuid4())
-        cursor.execute('''
-            INSERT INTO assessment_results (id, user_id, assessment_type, scores, risk_level, ai_insights)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (result_id, user['id'], assessment_type, 
-              json.dumps(scores), ai_insights['risk_level'], 
-              json.dumps(ai_insights)))
-        
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        st.error(f"Error saving results: {e}")
+        # Reset runs as a callback, so the click costs one rerun instead of two
+        st.button('🔄 New Assessment', use_container_width=True, on_click=_leave_assessment)
+
+@st.cache_resource(show_spinner=False)
+def get_automations_frame() -> pd.DataFrame:
+    # Static table built once per process and shared; st.dataframe only reads it
+    return pd.DataFrame({
+        "Type": ["Individual Reports", "High Risk Alert", "Monthly Summary"],
+        "Trigger": ["After Assessment", "Risk > High", "Monthly"],
+        "Recipients": ["Self", "Manager + HR", "Leadership Team"],
+        "Status": ["✅ Active", "✅ Active", "⏸️ Paused"]
+    })
 
 def show_reports_center():
     user = st.session_state.current_user
+    # Captured once per render for report dates and download file names
+    today = datetime.date.today()
     
     st.title("📄 Professional Reports Center")
     
@@ -1822,6 +2437,9 @@ def show_reports_center():
     
     st.markdown("---")
     
+    # Outcome of emails queued on earlier reruns
+    show_email_status()
+    
     # Reports feature banner
     st.markdown("""
     <div style="background: linear-gradient(135deg, #2ecc71 0%, #27ae60 100%); padding: 1.5rem; border-radius: 10px; margin-bottom: 2rem; color: white;">
@@ -1855,7 +2473,7 @@ def show_reports_center():
             
             date_range = st.date_input(
                 "Date Range",
-                value=(datetime.date.today() - datetime.timedelta(days=90), datetime.date.today())
+                value=(today - datetime.timedelta(days=90), today)
             )
             
             include_ai = st.checkbox("Include AI Analysis", value=True)
@@ -1873,20 +2491,15 @@ def show_reports_center():
         
         if st.button("📄 Generate Professional Report", type="primary"):
             with st.spinner("🤖 Generating AI-enhanced clinical report..."):
-                # Simulate report generation
-                progress_bar = st.progress(0)
-                for i in range(100):
-                    progress_bar.progress(i + 1)
-                
-                # Generate actual PDF report
-                pdf_generator = ClinicalPDFGenerator()
+                # One update per real milestone; each progress() call is a round-trip to the browser
+                progress_bar = st.progress(10, text="Fetching data")
                 
                 # Mock assessment data (in real app, fetch from database)
                 assessment_data = [{
                     'type': 'pss10',
                     'scores': {'total_score': 18, 'max_score': 40, 'category': 'Moderate Stress', 'percentage': 45},
                     'risk_level': 'moderate',
-                    'date': datetime.datetime.now().isoformat()
+                    'date': today.isoformat()
                 }]
                 
                 # Mock AI insights
@@ -1901,7 +2514,9 @@ def show_reports_center():
                     'next_assessment_recommended': 30
                 }
                 
-                pdf_data = pdf_generator.generate_clinical_report(user, assessment_data, ai_insights)
+                progress_bar.progress(60, text="Rendering PDF")
+                pdf_data = build_clinical_report(user, assessment_data, ai_insights)
+                progress_bar.progress(100, text="Done")
                 
                 st.success("✅ Professional clinical report generated successfully!")
                 
@@ -1909,23 +2524,21 @@ def show_reports_center():
                 st.download_button(
                     label='📥 Download Clinical PDF Report',
                     data=pdf_data,
-                    file_name=f'strive_clinical_report_{datetime.date.today().strftime("%Y%m%d")}.pdf',
+                    file_name=f'strive_clinical_report_{today:%Y%m%d}.pdf',
                     mime='application/pdf'
                 )
                 
                 # Email option
                 if st.button("📧 Email Report Now"):
-                    email_system = EmailAutomationSystem(EnterpriseDatabase())
-                    success = email_system.send_assessment_report(
+                    queue_email(
+                        get_email_system().send_assessment_report,
                         recipient_email, 
                         user['full_name'], 
                         pdf_data,
-                        f"STRIVE Pro - Clinical Assessment Report"
+                        f"STRIVE Pro - Clinical Assessment Report",
+                        success_message=f"✅ Report emailed to {recipient_email}",
+                        failure_message="❌ Email delivery failed"
                     )
-                    if success:
-                        st.success(f"✅ Report emailed to {recipient_email}")
-                    else:
-                        st.error("❌ Email delivery failed")
     
     with tab2:
         st.subheader("🏢 Organizational Reports")
@@ -1959,7 +2572,7 @@ STRIVE Pro - Organizational Mental Health Report
 
 Organization: {user['organization']}
 Report Period: {time_period}
-Generated: {datetime.datetime.now().strftime('%B %d, %Y')}
+Generated: {today:%B %d, %Y}
 Confidentiality: {confidentiality}
 
 EXECUTIVE SUMMARY
@@ -1994,7 +2607,7 @@ Confidential - For {confidentiality} Only
             st.download_button(
                 label='📥 Download Organizational Report',
                 data=org_report_content.encode('utf-8'),
-                file_name=f'org_report_{datetime.date.today().strftime("%Y%m%d")}.txt',
+                file_name=f'org_report_{today:%Y%m%d}.txt',
                 mime='text/plain'
             )
     
@@ -2042,18 +2655,33 @@ Confidential - For {confidentiality} Only
         
         # Active automations
         st.markdown("**🔄 Active Automations**")
-        active_automations = [
-            {"Type": "Individual Reports", "Trigger": "After Assessment", "Recipients": "Self", "Status": "✅ Active"},
-            {"Type": "High Risk Alert", "Trigger": "Risk > High", "Recipients": "Manager + HR", "Status": "✅ Active"},
-            {"Type": "Monthly Summary", "Trigger": "Monthly", "Recipients": "Leadership Team", "Status": "⏸️ Paused"}
-        ]
-        
-        automations_df = pd.DataFrame(active_automations)
-        st.dataframe(automations_df, use_container_width=True)
+        st.dataframe(get_automations_frame(), use_container_width=True)
         
         if st.button("💾 Save Automation Settings", type="primary"):
             st.success("✅ Automation settings saved successfully!")
 
+_ROLES_INFO = (
+    ('user', 'Standard User', ('Take Assessments', 'View Own Results', 'Download Own Reports')),
+    ('manager', 'Manager', ('All User Permissions', 'View Team Results', 'Generate Team Reports')),
+    ('hr_admin', 'HR Administrator', ('All Manager Permissions', 'User Management', 'Organization Analytics')),
+    ('admin', 'Administrator', ('All HR Admin Permissions', 'System Configuration', 'Advanced Analytics')),
+    ('super_admin', 'Super Administrator', ('All Permissions', 'Multi-Organization Access', 'System Administration')),
+)
+
+# (expander title, markdown) per role, rendered as one element per expander
+_ROLE_PERMISSIONS_MD = tuple(
+    (f"{name} ({role_key})", "**Permissions:**\n\n" + "\n\n".join(f"• {perm}" for perm in permissions))
+    for role_key, name, permissions in _ROLES_INFO
+)
+
+def _show_pool_health():
+    # Connection pool gauges for administrators; a non-zero waiter count means the pools are undersized
+    stats = get_db().pool_stats()
+    with st.sidebar.expander("🩺 Database Health"):
+        st.metric("Free Read Connections", f"{stats['read_free']}/{SQLITE_READ_POOL_SIZE}")
+        st.metric("Free Write Connections", f"{stats['write_free']}/{SQLITE_WRITE_POOL_SIZE}")
+        st.metric("Waiting Sessions", stats['waiters'])
+
 def show_user_management():
     user = st.session_state.current_user
     
@@ -2070,6 +2698,8 @@ def show_user_management():
         st.error("🚫 Access Denied: Administrator privileges required")
         return
     
+    _show_pool_health()
+    
     # User management tabs
     tab1, tab2, tab3, tab4 = st.tabs(["Users Overview", "Create User", "Organization Management", "Access Control"])
     
@@ -2077,44 +2707,37 @@ def show_user_management():
         st.subheader("👤 Users Overview")
         
         # Load users
-        db = EnterpriseDatabase()
-        auth = AuthenticationManager(db)
-        users = auth.get_users_by_organization(user['organization'])
-        
-        if users:
-            users_data = []
-            for u in users:
-                users_data.append({
-                    'Username': u['username'],
-                    'Full Name': u['full_name'],
-                    'Email': u['email'],
-                    'Role': u['role'].title(),
-                    'Department': u['department'] or 'N/A',
-                    'Status': '✅ Active' if u['is_active'] else '❌ Inactive',
-                    'Created': u['created_at'][:10] if u['created_at'] else 'N/A'
-                })
-            
-            users_df = pd.DataFrame(users_data)
+        frame = cached_org_users_frame(user['organization'])
+        
+        if not frame.empty:
+            # Every display column is a vectorized transform of the query's columns
+            is_active = frame['is_active'].fillna(0).astype(bool).to_numpy()
+            users_df = pd.DataFrame({
+                'Username': frame['username'],
+                'Full Name': frame['full_name'],
+                'Email': frame['email'],
+                'Role': frame['role'].str.title(),
+                'Department': frame['department'].fillna('').replace('', 'N/A'),
+                'Status': np.where(is_active, '✅ Active', '❌ Inactive'),
+                'Created': frame['created_at'].fillna('').str[:10].replace('', 'N/A')
+            })
             st.dataframe(users_df, use_container_width=True)
             
-            # User statistics
+            # User statistics, aggregated by SQLite in a single query
+            stats = cached_org_user_stats(user['organization'])
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("Total Users", len(users))
+                st.metric("Total Users", stats['total'])
             
             with col2:
-                active_users = len([u for u in users if u['is_active']])
-                st.metric("Active Users", active_users)
+                st.metric("Active Users", stats['active'])
             
             with col3:
-                admin_users = len([u for u in users if u['role'] in ['admin', 'super_admin']])
-                st.metric("Admin Users", admin_users)
+                st.metric("Admin Users", stats['admins'])
             
             with col4:
-                recent_users = len([u for u in users if u['created_at'] and 
-                                  (datetime.datetime.now() - datetime.datetime.fromisoformat(u['created_at'])).days <= 30])
-                st.metric("New Users (30d)", recent_users)
+                st.metric("New Users (30d)", stats['recent'])
         else:
             st.info("No users found in your organization.")
     
@@ -2150,11 +2773,10 @@ def show_user_management():
                         'department': new_department
                     }
                     
-                    db = EnterpriseDatabase()
-                    auth = AuthenticationManager(db)
-                    result = auth.create_user(user_data)
+                    result = get_auth_manager().create_user(user_data)
                     
                     if result['success']:
+                        _clear_org_membership_caches()
                         st.success("✅ User created successfully!")
                         
                         if send_welcome_email:
@@ -2170,9 +2792,8 @@ def show_user_management():
         st.subheader("🏢 Organization Management")
         
         # Organization stats
-        db = EnterpriseDatabase()
-        analytics = EnterpriseAnalytics(db)
-        org_data = analytics.get_organization_dashboard_data(user['organization'])
+        full_dashboard = cached_full_dashboard(user['organization'], _day_bucket())
+        org_data = full_dashboard['summary']
         
         st.markdown(f"**Organization:** {user['organization']}")
         
@@ -2189,21 +2810,20 @@ def show_user_management():
         
         # Department breakdown
         st.markdown("**Department Breakdown**")
-        dept_data = analytics.get_department_analytics(user['organization'])
-        
-        if dept_data:
-            dept_breakdown = []
-            for dept_name, data in dept_data.items():
-                dept_breakdown.append({
-                    'Department': dept_name,
-                    'Users': data['total_users'],
-                    'Assessed': data['assessed_users'],
-                    'Participation': f"{data['participation_rate']:.1f}%",
-                    'Avg Risk': f"{data['avg_risk_score']:.2f}"
-                })
-            
-            dept_df = pd.DataFrame(dept_breakdown)
-            st.dataframe(dept_df, use_container_width=True)
+        dept_data = full_dashboard['by_department']
+        
+        if dept_data['department']:
+            dept_df = pd.DataFrame({
+                'Department': dept_data['department'],
+                'Users': dept_data['total_users'],
+                'Assessed': dept_data['assessed_users'],
+                'Participation': dept_data['participation_rate'],
+                'Avg Risk': dept_data['avg_risk_score']
+            })
+            st.dataframe(dept_df, use_container_width=True, column_config={
+                'Participation': st.column_config.NumberColumn(format="%.1f%%"),
+                'Avg Risk': st.column_config.NumberColumn(format="%.2f")
+            })
         
         # Organization settings
         st.markdown("**Organization Settings**")
@@ -2230,39 +2850,9 @@ def show_user_management():
         # Role definitions
         st.markdown("**Role Definitions & Permissions**")
         
-        roles_info = {
-            'user': {
-                'name': 'Standard User',
-                'permissions': ['Take Assessments', 'View Own Results', 'Download Own Reports'],
-                'color': '#6c757d'
-            },
-            'manager': {
-                'name': 'Manager',
-                'permissions': ['All User Permissions', 'View Team Results', 'Generate Team Reports'],
-                'color': '#007bff'
-            },
-            'hr_admin': {
-                'name': 'HR Administrator',
-                'permissions': ['All Manager Permissions', 'User Management', 'Organization Analytics'],
-                'color': '#28a745'
-            },
-            'admin': {
-                'name': 'Administrator',
-                'permissions': ['All HR Admin Permissions', 'System Configuration', 'Advanced Analytics'],
-                'color': '#fd7e14'
-            },
-            'super_admin': {
-                'name': 'Super Administrator',
-                'permissions': ['All Permissions', 'Multi-Organization Access', 'System Administration'],
-                'color': '#dc3545'
-            }
-        }
-        
-        for role_key, role_info in roles_info.items():
-            with st.expander(f"{role_info['name']} ({role_key})"):
-                st.markdown(f"**Permissions:**")
-                for perm in role_info['permissions']:
-                    st.markdown(f"• {perm}")
+        for title, permissions_md in _ROLE_PERMISSIONS_MD:
+            with st.expander(title):
+                st.markdown(permissions_md)
         
         # Security settings
         st.markdown("**Security Settings**")
@@ -2287,6 +2877,63 @@ def show_user_management():
 # MAIN APPLICATION
 # ============================================================================
 
+# Streamlit drops elements a rerun does not re-emit, so the stylesheet is sent every
+# rerun; whitespace is collapsed to keep that payload small. The module body (and so
+# this join) also runs on every rerun under streamlit run, which costs microseconds.
+_APP_CSS = " ".join("""
+<style>
+.main {
+    padding-top: 1rem;
+}
+.stButton > button {
+    width: 100%;
+    border-radius: 10px;
+    border: none;
+    background-color: #3498db;
+    color: white;
+    font-weight: bold;
+    transition: all 0.3s;
+    padding: 0.5rem 1rem;
+}
+.stButton > button:hover {
+    background-color: #2980b9;
+    transform: translateY(-2px);
+    box-shadow: 0 4px 8px rgba(0,0,0,0.2);
+}
+.stButton > button[kind="primary"] {
+    background-color: #2ecc71;
+}
+.stButton > button[kind="primary"]:hover {
+    background-color: #27ae60;
+}
+.stSelectbox > div > div > select,
+.stTextInput > div > div > input,
+.stTextArea > div > div > textarea {
+    border-radius: 10px;
+}
+.stExpander {
+    border-radius: 10px;
+    border: 1px solid #e1e8ed;
+}
+.stDataFrame {
+    border-radius: 10px;
+}
+.stTabs [data-baseweb="tab-list"] {
+    gap: 2px;
+}
+.stTabs [data-baseweb="tab"] {
+    height: 50px;
+    border-radius: 10px 10px 0 0;
+    background-color: #f8f9fa;
+    border: 1px solid #dee2e6;
+}
+.stTabs [aria-selected="true"] {
+    background-color: #3498db;
+    color: white;
+}
+</style>
+""".split())
+
 def main():
     st.set_page_config(
         page_title='STRIVE Pro Enterprise - Mental Wellness Platform',
@@ -2299,59 +2946,7 @@ def main():
     init_session_state()
     
     # Custom CSS
-    st.markdown("""
-    <style>
-    .main {
-        padding-top: 1rem;
-    }
-    .stButton > button {
-        width: 100%;
-        border-radius: 10px;
-        border: none;
-        background-color: #3498db;
-        color: white;
-        font-weight: bold;
-        transition: all 0.3s;
-        padding: 0.5rem 1rem;
-    }
-    .stButton > button:hover {
-        background-color: #2980b9;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-    }
-    .stButton > button[kind="primary"] {
-        background-color: #2ecc71;
-    }
-    .stButton > button[kind="primary"]:hover {
-        background-color: #27ae60;
-    }
-    .stSelectbox > div > div > select,
-    .stTextInput > div > div > input,
-    .stTextArea > div > div > textarea {
-        border-radius: 10px;
-    }
-    .stExpander {
-        border-radius: 10px;
-        border: 1px solid #e1e8ed;
-    }
-    .stDataFrame {
-        border-radius: 10px;
-    }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        border-radius: 10px 10px 0 0;
-        background-color: #f8f9fa;
-        border: 1px solid #dee2e6;
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: #3498db;
-        color: white;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_APP_CSS, unsafe_allow_html=True)
     
     # Authentication check
     if not st.session_state.authenticated:
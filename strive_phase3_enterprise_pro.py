@@ -7,17 +7,21 @@ import numpy as np
 import datetime
 import json
 import os
-import hashlib
 import uuid
 import base64
 import io
-from typing import Dict, List, Optional, Tuple, Any
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 import sqlite3
 from dataclasses import dataclass, asdict
 from enum import Enum
 import warnings
 warnings.filterwarnings('ignore')
 
+# Password hashing shared with the v2 app
+import strive_security
+
 # ============================================================================
 # APPLICATION CONFIGURATION
 # ============================================================================
@@ -29,6 +33,9 @@ ENTERPRISE_FEATURES = True
 API_VERSION = "v1.0"
 CLINICAL_COMPLIANCE = True
 
+# Database and trained models live next to this file, not in the working directory
+APP_DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # APA Guidelines Compliance
 APA_STANDARDS = {
     "ethical_guidelines": True,
@@ -97,98 +104,118 @@ class User:
 # ENHANCED DATABASE MANAGER
 # ============================================================================
 
+# Applied to every connection; WAL lets dashboard reads run alongside the login writer
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=134217728",  # 128 MiB
+)
+
 class EnterpriseDatabase:
-    def __init__(self, db_path: str = "strive_enterprise_v3.db"):
+    def __init__(self, db_path: str = os.path.join(APP_DATA_DIR, "strive_enterprise_v3.db")):
         self.db_path = db_path
+        # One process-wide handle; the lock serializes its use across sessions and reruns
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            self._conn.execute(pragma)
+        self._lock = threading.Lock()
         self.init_database()
     
     def init_database(self):
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Enhanced Users table with consent and privacy
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id TEXT PRIMARY KEY,
-                    username TEXT UNIQUE NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    full_name TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    organization TEXT,
-                    department TEXT,
-                    manager_id TEXT,
-                    is_active BOOLEAN DEFAULT 1,
-                    consent_given BOOLEAN DEFAULT 0,
-                    privacy_settings TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP
-                )
-            ''')
-            
-            # Enhanced Assessment results table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS assessment_results (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    assessment_type TEXT NOT NULL,
-                    scores TEXT NOT NULL,
-                    risk_level TEXT NOT NULL,
-                    ai_insights TEXT,
-                    clinician_notes TEXT,
-                    follow_up_required BOOLEAN DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Interventions tracking table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS interventions (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    intervention_type TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    recommended_by TEXT NOT NULL,
-                    assigned_to TEXT,
-                    description TEXT NOT NULL,
-                    goals TEXT,
-                    start_date TIMESTAMP NOT NULL,
-                    target_completion_date TIMESTAMP,
-                    actual_completion_date TIMESTAMP,
-                    outcome_measures TEXT,
-                    effectiveness_score REAL,
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Professional consultations table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS professional_consultations (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    clinician_id TEXT NOT NULL,
-                    session_type TEXT NOT NULL,
-                    session_date TIMESTAMP NOT NULL,
-                    duration_minutes INTEGER,
-                    presenting_concerns TEXT,
-                    assessment_summary TEXT,
-                    intervention_plan TEXT,
-                    next_session_date TIMESTAMP,
-                    outcome_rating INTEGER,
-                    clinical_notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create default users if not exists
-            cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'super_admin'")
-            if cursor.fetchone()[0] == 0:
-                self._create_default_users(cursor)
-            
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Enhanced Users table with consent and privacy
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS users (
+                        id TEXT PRIMARY KEY,
+                        username TEXT UNIQUE NOT NULL,
+                        email TEXT UNIQUE NOT NULL,
+                        password_hash TEXT NOT NULL,
+                        full_name TEXT NOT NULL,
+                        role TEXT NOT NULL,
+                        organization TEXT,
+                        department TEXT,
+                        manager_id TEXT,
+                        is_active BOOLEAN DEFAULT 1,
+                        consent_given BOOLEAN DEFAULT 0,
+                        privacy_settings TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        last_login TIMESTAMP
+                    )
+                ''')
+                
+                # Enhanced Assessment results table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS assessment_results (
+                        id TEXT PRIMARY KEY,
+                        user_id TEXT NOT NULL,
+                        assessment_type TEXT NOT NULL,
+                        scores TEXT NOT NULL,
+                        risk_level TEXT NOT NULL,
+                        ai_insights TEXT,
+                        clinician_notes TEXT,
+                        follow_up_required BOOLEAN DEFAULT 0,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
+                # Interventions tracking table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS interventions (
+                        id TEXT PRIMARY KEY,
+                        user_id TEXT NOT NULL,
+                        intervention_type TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        recommended_by TEXT NOT NULL,
+                        assigned_to TEXT,
+                        description TEXT NOT NULL,
+                        goals TEXT,
+                        start_date TIMESTAMP NOT NULL,
+                        target_completion_date TIMESTAMP,
+                        actual_completion_date TIMESTAMP,
+                        outcome_measures TEXT,
+                        effectiveness_score REAL,
+                        notes TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
+                # Professional consultations table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS professional_consultations (
+                        id TEXT PRIMARY KEY,
+                        user_id TEXT NOT NULL,
+                        clinician_id TEXT NOT NULL,
+                        session_type TEXT NOT NULL,
+                        session_date TIMESTAMP NOT NULL,
+                        duration_minutes INTEGER,
+                        presenting_concerns TEXT,
+                        assessment_summary TEXT,
+                        intervention_plan TEXT,
+                        next_session_date TIMESTAMP,
+                        outcome_rating INTEGER,
+                        clinical_notes TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
+                # Indexes on the per-user and per-clinician lookups; username is already UNIQUE
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_ar_user ON assessment_results(user_id, created_at DESC)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_int_user ON interventions(user_id, status)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_pc_user ON professional_consultations(user_id, session_date DESC)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_pc_clin ON professional_consultations(clinician_id, session_date DESC)')
+                
+                # Create default users if not exists
+                cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'super_admin'")
+                if cursor.fetchone()[0] == 0:
+                    self._create_default_users(cursor)
+                
+                conn.commit()
         except Exception as e:
             st.error(f"Database initialization error: {e}")
     
@@ -223,19 +250,36 @@ class EnterpriseDatabase:
         except Exception as e:
             st.error(f"Error creating default users: {e}")
     
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.rollback()
+                raise
     
     def hash_password(self, password: str) -> str:
-        return hashlib.sha256(password.encode()).hexdigest()
+        return strive_security.hash_password(password)
+    
+    def needs_rehash(self, hash: str) -> bool:
+        return strive_security.needs_rehash(hash)
     
     def verify_password(self, password: str, hash: str) -> bool:
-        return self.hash_password(password) == hash
+        return strive_security.verify_password(password, hash)
+
+@st.cache_resource(show_spinner=False)
+def get_db() -> EnterpriseDatabase:
+    # Schema setup runs once per process and connections stay open between reruns
+    return EnterpriseDatabase()
 
 # ============================================================================
 # AI RISK PREDICTION ENGINE
 # ============================================================================
 
+# Fitted models are persisted next to the database so later processes skip training
+RISK_MODEL_CACHE_PATH = os.path.join(APP_DATA_DIR, "strive_risk_models_v3.joblib")
+
 class AdvancedAIRiskPredictor:
     def __init__(self):
         try:
@@ -243,15 +287,17 @@ class AdvancedAIRiskPredictor:
             from sklearn.preprocessing import StandardScaler
             
             self.models = {
-                'primary': RandomForestClassifier(n_estimators=150, random_state=42),
-                'secondary': GradientBoostingClassifier(n_estimators=100, random_state=42)
+                # Sized for single-row latency on the interactive results page
+                'primary': RandomForestClassifier(n_estimators=64, max_depth=12, n_jobs=-1, random_state=42),
+                'secondary': GradientBoostingClassifier(n_estimators=50, max_depth=4, random_state=42)
             }
             self.scaler = StandardScaler()
             self.feature_names = ['age', 'stress_score', 'burnout_score', 'worklife_score', 
                                  'prev_assessments', 'days_since_last', 'intervention_count']
             self.is_trained = False
             self.model_accuracy = 0.0
-            self._train_models()
+            if not self._load_models():
+                self._train_models()
         except ImportError:
             st.warning("Scikit-learn not available. Using fallback prediction model.")
             self.is_trained = False
@@ -278,6 +324,7 @@ class AdvancedAIRiskPredictor:
             
             # Scale features
             X_scaled = self.scaler.fit_transform(X)
+            self._cache_scaler_params()
             
             # Train ensemble models
             self.models['primary'].fit(X_scaled, y)
@@ -289,50 +336,78 @@ class AdvancedAIRiskPredictor:
             self.model_accuracy = (primary_score + secondary_score) / 2
             
             self.is_trained = True
+            self._save_models()
         except Exception as e:
             st.warning(f"Model training error: {e}. Using fallback prediction.")
             self.is_trained = False
     
+    def _cache_scaler_params(self):
+        # Single-row predictions standardize directly instead of going through scaler.transform.
+        # Kept in float64 so scaled values land on the same side of every tree split.
+        self._mean = self.scaler.mean_
+        self._scale = self.scaler.scale_
+    
+    def _cache_signature(self) -> Dict:
+        import sklearn
+        
+        # Any change here invalidates the on-disk models
+        return {
+            'sklearn_version': sklearn.__version__,
+            'feature_names': self.feature_names,
+            'params': {name: model.get_params() for name, model in self.models.items()}
+        }
+    
+    def _load_models(self) -> bool:
+        """Restore fitted models from disk if they match the current configuration"""
+        import joblib
+        
+        try:
+            cached = joblib.load(RISK_MODEL_CACHE_PATH)
+            if cached['signature'] != self._cache_signature():
+                return False
+        except Exception:
+            # Missing, unreadable or incompatible cache; retrain instead
+            return False
+        
+        self.models = cached['models']
+        self.scaler = cached['scaler']
+        self._cache_scaler_params()
+        self.model_accuracy = cached['accuracy']
+        self.is_trained = True
+        return True
+    
+    def _save_models(self):
+        import joblib
+        
+        try:
+            joblib.dump({
+                'signature': self._cache_signature(),
+                'models': self.models,
+                'scaler': self.scaler,
+                'accuracy': self.model_accuracy
+            }, RISK_MODEL_CACHE_PATH, compress=3)
+        except OSError:
+            # Read-only deployments simply retrain on the next start
+            pass
+    
     def _generate_risk_labels(self, X):
         """Generate sophisticated risk labels based on multiple factors"""
-        y = []
-        for i in range(len(X)):
-            age, stress, burnout, worklife, prev_assess, days_since, interventions = X[i]
-            
-            # Base risk calculation
-            risk_score = 0
-            
-            # Stress contribution
-            if stress > 30: risk_score += 3
-            elif stress > 20: risk_score += 2
-            elif stress > 10: risk_score += 1
-            
-            # Burnout contribution
-            if burnout > 70: risk_score += 3
-            elif burnout > 50: risk_score += 2
-            elif burnout > 30: risk_score += 1
-            
-            # Work-life balance (inverse relationship)
-            if worklife < 5: risk_score += 2
-            elif worklife < 10: risk_score += 1
-            
-            # Age factor
-            if age > 50: risk_score += 1
-            elif age < 25: risk_score += 1
-            
-            # Recent assessment factor
-            if days_since > 180: risk_score += 1
-            
-            # Intervention history
-            if interventions == 0 and risk_score > 2: risk_score += 1
-            
-            # Convert to categorical risk
-            if risk_score >= 6: y.append(3)  # Critical
-            elif risk_score >= 4: y.append(2)  # High
-            elif risk_score >= 2: y.append(1)  # Moderate
-            else: y.append(0)  # Low
-            
-        return np.array(y)
+        age, stress, burnout, worklife, prev_assess, days_since, interventions = X.T
+        
+        # Stress and burnout add 1-3 points above each threshold; poor work-life balance adds 1-2
+        risk_score = (np.digitize(stress, [10, 20, 30], right=True)
+                      + np.digitize(burnout, [30, 50, 70], right=True)
+                      + 2 - np.digitize(worklife, [5, 10]))
+        
+        # Age factor and recent assessment factor
+        risk_score += (age > 50) | (age < 25)
+        risk_score += days_since > 180
+        
+        # Intervention history
+        risk_score += (interventions == 0) & (risk_score > 2)
+        
+        # Convert to categorical risk: Low, Moderate, High, Critical
+        return np.digitize(risk_score, [2, 4, 6])
     
     def predict_risk_with_ensemble(self, assessment_data: Dict) -> Dict:
         """Enhanced risk prediction with ensemble methods"""
@@ -342,7 +417,7 @@ class AdvancedAIRiskPredictor:
         try:
             # Extract enhanced features
             features = self._extract_enhanced_features(assessment_data)
-            features_scaled = self.scaler.transform([features])
+            features_scaled = ((np.asarray(features, dtype=np.float64) - self._mean) / self._scale).reshape(1, -1)
             
             # Ensemble prediction
             primary_proba = self.models['primary'].predict_proba(features_scaled)[0]
@@ -491,6 +566,11 @@ class AdvancedAIRiskPredictor:
         }
         return intervals.get(risk_level, 30)
 
+@st.cache_resource(show_spinner=False)
+def get_risk_predictor() -> AdvancedAIRiskPredictor:
+    # Loaded (or trained) once per process and shared across reruns and sessions
+    return AdvancedAIRiskPredictor()
+
 # ============================================================================
 # AUTHENTICATION & USER MANAGEMENT
 # ============================================================================
@@ -501,20 +581,22 @@ class AuthenticationManager:
     
     def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, username, email, password_hash, full_name, role, organization, department, is_active
-                FROM users WHERE username = ? AND is_active = 1
-            ''', (username,))
-            
-            result = cursor.fetchone()
-            conn.close()
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT id, username, email, password_hash, full_name, role, organization, department, is_active
+                    FROM users WHERE username = ? AND is_active = 1
+                ''', (username,))
+                
+                result = cursor.fetchone()
             
+            # The KDF runs after the lock is released so other sessions are not blocked
             if result and self.db.verify_password(password, result[3]):
-                # Update last login
+                # Update last login, upgrading legacy password hashes on the way
                 self._update_last_login(result[0])
+                if self.db.needs_rehash(result[3]):
+                    self._update_password_hash(result[0], password)
                 
                 return {
                     'id': result[0],
@@ -532,14 +614,24 @@ class AuthenticationManager:
     
     def _update_last_login(self, user_id: str):
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('UPDATE users SET last_login = ? WHERE id = ?', 
-                          (datetime.datetime.now().isoformat(), user_id))
-            conn.commit()
-            conn.close()
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('UPDATE users SET last_login = ? WHERE id = ?', 
+                              (datetime.datetime.now().isoformat(), user_id))
+                conn.commit()
         except Exception as e:
             st.warning(f"Could not update last login: {e}")
+    
+    def _update_password_hash(self, user_id: str, password: str):
+        try:
+            # Hash before taking the connection lock
+            password_hash = self.db.hash_password(password)
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+                conn.commit()
+        except Exception as e:
+            st.warning(f"Could not upgrade password hash: {e}")
 
 # ============================================================================
 # SESSION STATE MANAGEMENT
@@ -828,7 +920,7 @@ def show_login_page():
             
             if login_clicked:
                 if username and password:
-                    db = EnterpriseDatabase()
+                    db = get_db()
                     auth = AuthenticationManager(db)
                     user = auth.authenticate_user(username, password)
                     
@@ -872,7 +964,7 @@ def show_login_page():
             
             if login_clicked:
                 if username and password:
-                    db = EnterpriseDatabase()
+                    db = get_db()
                     auth = AuthenticationManager(db)
                     user = auth.authenticate_user(username, password)
                     
@@ -916,7 +1008,7 @@ def show_login_page():
             
             if login_clicked:
                 if username and password:
-                    db = EnterpriseDatabase()
+                    db = get_db()
                     auth = AuthenticationManager(db)
                     user = auth.authenticate_user(username, password)
                     
@@ -1539,7 +1631,7 @@ def show_assessment_results():
     scores = calculate_assessment_scores(assessment_type, answers)
     
     # AI Risk Prediction
-    ai_predictor = AdvancedAIRiskPredictor()
+    ai_predictor = get_risk_predictor()
     assessment_data = {
         'age': 35,  # Could be collected from user profile
         f'{assessment_type}_score': scores['total_score'],
@@ -2259,7 +2351,7 @@ def show_user_management():
                 if all([new_username, new_email, new_full_name, new_password, new_role]):
                     try:
                         # Create user in database
-                        db = EnterpriseDatabase()
+                        db = get_db()
                         auth = AuthenticationManager(db)
                         
                         user_data = {
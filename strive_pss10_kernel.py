@@ -0,0 +1,40 @@
+# strive_pss10_kernel.py
+# Batch PSS-10 scoring kernel for strive_enhanced_app.
+#
+# Lives in its own module so the compiled kernel stays in sys.modules across
+# Streamlit reruns, and Numba is only imported once batch scoring is used.
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# PSS-10 reverse-scored items (4, 5, 7, 8) as a mask for batch scoring
+PSS10_REVERSE = np.array([0, 0, 0, 1, 1, 0, 1, 1, 0, 0], dtype=np.int8)
+
+def pss10_batch_numpy(answers_2d):
+    '''Vectorized PSS-10 totals, used when Numba is not installed'''
+    answers_2d = answers_2d.astype(np.int32)
+    return np.where(PSS10_REVERSE == 1, 4 - answers_2d, answers_2d).sum(axis=1).astype(np.int32)
+
+if NUMBA_AVAILABLE:
+    # Compiled (or loaded from Numba's on-disk cache) on the first call
+    @njit(cache=True, fastmath=True)
+    def pss10_batch(answers_2d):
+        n = answers_2d.shape[0]
+        out = np.empty(n, np.int32)
+        for i in range(n):
+            s = 0
+            for j in range(10):
+                v = answers_2d[i, j]
+                if PSS10_REVERSE[j]:
+                    s += 4 - v
+                else:
+                    s += v
+            out[i] = s
+        return out
+else:
+    pss10_batch = pss10_batch_numpy
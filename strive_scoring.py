@@ -0,0 +1,129 @@
+# strive_scoring.py
+# Assessment scoring for strive_enterprise_v2.
+#
+# Kept out of the Streamlit script so the memoized scorers are built once per
+# process (held in sys.modules) instead of being rebuilt empty on every rerun.
+
+import bisect
+import functools
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# PSS-10 items 4, 5, 7 and 8 are reverse-scored: (4 - a) == -a + 4
+_PSS10_SIGN = np.array([1, 1, 1, -1, -1, 1, -1, -1, 1, 1], dtype=np.int8)
+_PSS10_OFFSET = np.array([0, 0, 0, 4, 4, 0, 4, 4, 0, 0], dtype=np.int8)
+
+def calculate_pss10_batch(answers_matrix) -> np.ndarray:
+    # (N, 10) answers -> N totals in one dot product
+    answers_matrix = np.asarray(answers_matrix, dtype=np.int16)
+    n_items = answers_matrix.shape[1]
+    return answers_matrix.dot(_PSS10_SIGN[:n_items]) + int(_PSS10_OFFSET[:n_items].sum())
+
+def calculate_total_batch(answers_matrix) -> np.ndarray:
+    # Plain-sum instruments (DASS-21, burnout, work-life) scored for N respondents at once
+    return np.asarray(answers_matrix, dtype=np.int16).sum(axis=1)
+
+# Score bands: (bound, category, risk_level, color), looked up with bisect
+_PSS10_BANDS = (
+    (13, "Tingkat Stress Rendah", "low", "#28a745"),
+    (26, "Tingkat Stress Sedang", "moderate", "#ffc107"),
+    (float('inf'), "Tingkat Stress Tinggi", "high", "#dc3545"),
+)
+_DASS21_BANDS = (
+    (20, "Normal", "low", "#28a745"),
+    (40, "Ringan", "moderate", "#ffc107"),
+    (60, "Sedang", "high", "#fd7e14"),
+    (float('inf'), "Berat", "critical", "#dc3545"),
+)
+_BURNOUT_BANDS = (
+    (30, "Burnout Rendah", "low", "#28a745"),
+    (60, "Burnout Sedang", "moderate", "#ffc107"),
+    (float('inf'), "Burnout Tinggi", "high", "#dc3545"),
+)
+# Work-life is scored the other way round: bounds are inclusive lower limits
+_WORKLIFE_BANDS = (
+    (float('-inf'), "Work-Life Balance Buruk", "high", "#dc3545"),
+    (40, "Work-Life Balance Cukup", "moderate", "#ffc107"),
+    (60, "Work-Life Balance Baik", "low", "#20c997"),
+    (75, "Work-Life Balance Sangat Baik", "low", "#28a745"),
+)
+_PSS10_BOUNDS = [band[0] for band in _PSS10_BANDS]
+_DASS21_BOUNDS = [band[0] for band in _DASS21_BANDS]
+_BURNOUT_BOUNDS = [band[0] for band in _BURNOUT_BANDS]
+_WORKLIFE_BOUNDS = [band[0] for band in _WORKLIFE_BANDS[1:]]
+
+# Below this length the builtin sum() beats NumPy's array conversion overhead
+_NUMPY_SUM_MIN_ITEMS = 64
+
+def _fast_sum(xs) -> int:
+    if len(xs) < _NUMPY_SUM_MIN_ITEMS:
+        return sum(xs)
+    return int(np.add.reduce(np.asarray(xs, dtype=np.int16)))
+
+def _score_result(total_score, max_score: int, percentage: float, band: Tuple) -> Dict:
+    _, category, risk_level, color = band
+    return {
+        "total_score": total_score,
+        "max_score": max_score,
+        "percentage": percentage,
+        "category": category,
+        "risk_level": risk_level,
+        "color": color
+    }
+
+# Answer vectors repeat heavily (same form, small Likert range), so scorers are
+# memoized on tuple(answers); callers get a fresh dict they are free to mutate
+SCORE_CACHE_SIZE = 4096
+
+def _memoize_scores(scorer):
+    cached = functools.lru_cache(maxsize=SCORE_CACHE_SIZE)(scorer)
+
+    @functools.wraps(scorer)
+    def wrapper(answers: List[int]) -> Dict:
+        return dict(cached(tuple(answers)))
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+@_memoize_scores
+def calculate_pss10_scores(answers: List[int]) -> Dict:
+    a = np.asarray(answers, dtype=np.int8)
+    n_items = len(a)
+    total_score = int((_PSS10_OFFSET[:n_items] + _PSS10_SIGN[:n_items] * a).sum())
+    band = _PSS10_BANDS[bisect.bisect_left(_PSS10_BOUNDS, total_score)]
+    return _score_result(total_score, 40, (total_score / 40) * 100, band)
+
+@_memoize_scores
+def calculate_dass21_scores(answers: List[int]) -> Dict:
+    total_score = _fast_sum(answers)
+    band = _DASS21_BANDS[bisect.bisect_left(_DASS21_BOUNDS, total_score)]
+    return _score_result(total_score, 63, (total_score / 63) * 100, band)
+
+@_memoize_scores
+def calculate_burnout_scores(answers: List[int]) -> Dict:
+    total_score = _fast_sum(answers)
+    max_score = len(answers) * 6
+    percentage = (total_score / max_score) * 100
+    band = _BURNOUT_BANDS[bisect.bisect_left(_BURNOUT_BOUNDS, percentage)]
+    return _score_result(total_score, max_score, percentage, band)
+
+@_memoize_scores
+def calculate_worklife_scores(answers: List[int]) -> Dict:
+    total_score = _fast_sum(answers)
+    max_score = len(answers) * 4
+    percentage = (total_score / max_score) * 100
+    band = _WORKLIFE_BANDS[bisect.bisect_right(_WORKLIFE_BOUNDS, percentage)]
+    return _score_result(total_score, max_score, percentage, band)
+
+_SCORERS = {
+    'pss10': calculate_pss10_scores,
+    'dass21': calculate_dass21_scores,
+    'burnout': calculate_burnout_scores,
+    'worklife': calculate_worklife_scores
+}
+
+def calculate_assessment_scores(assessment_type: str, answers: List[int]) -> Dict:
+    handler = _SCORERS.get(assessment_type)
+    return handler(answers) if handler else {}
@@ -0,0 +1,39 @@
+# strive_security.py
+# Password hashing shared by strive_enterprise_v2 and strive_phase3_enterprise_pro.
+#
+# Hashes are stored as "scrypt$<salt hex>$<digest hex>". Unsalted SHA-256 hex
+# digests from earlier releases still verify and are reported by needs_rehash
+# so callers can upgrade them on the next successful login.
+
+import hashlib
+import hmac
+import os
+
+# scrypt work factors for stored password hashes
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_DKLEN = 32
+
+def _scrypt(password: str, salt: bytes) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R,
+                          p=SCRYPT_P, dklen=SCRYPT_DKLEN)
+
+def hash_password(password: str) -> str:
+    salt = os.urandom(16)
+    return f"scrypt${salt.hex()}${_scrypt(password, salt).hex()}"
+
+def needs_rehash(hash: str) -> bool:
+    return not hash.startswith("scrypt$")
+
+def verify_password(password: str, hash: str) -> bool:
+    if needs_rehash(hash):
+        # Legacy unsalted SHA-256 hex digest; compare raw 32-byte digests
+        try:
+            stored = bytes.fromhex(hash)
+        except ValueError:
+            return False
+        return hmac.compare_digest(hashlib.sha256(password.encode()).digest(), stored)
+    _, salt_hex, digest_hex = hash.split("$")
+    return hmac.compare_digest(_scrypt(password, bytes.fromhex(salt_hex)),
+                               bytes.fromhex(digest_hex))